@@ -0,0 +1,379 @@
+"""Benchmarks for feature extraction and the exported model artifacts.
+
+``model`` measures what the content script pays on every page load: creating
+the inference session and running the first single-field prediction.
+``features`` sweeps synthetic pages of growing size through
+``extract_features_from_html`` for each parser backend and compares the
+results against a saved baseline.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from features import FieldFeatures, clear_score_cache, extract_features_from_html
+
+
+MODEL_VARIANTS = [
+    "form_detector.onnx",
+    "form_detector_b1.onnx",
+    "form_detector.ort",
+]
+
+PARSER_BACKENDS = ["html.parser", "lxml", "html5lib"]
+
+# "cold" clears the attribute score cache before every page, "warm" keeps it,
+# which is what a long-running corpus worker sees.
+CODE_PATHS = ["cold", "warm"]
+
+BASE_PAGE = {"inputs_per_form": 4, "forms": 1, "depth": 2, "padding_kb": 0}
+
+SWEEPS = {
+    "inputs_per_form": [1, 4, 16, 64],
+    "forms": [1, 4, 16],
+    "depth": [0, 4, 16, 32],
+    "padding_kb": [0, 16, 128],
+}
+
+TIMING_ROUNDS = 7
+MIN_RUNS_PER_ROUND = 5
+# Times a case that drops past the tolerance is re-run before it is reported;
+# the median of all its runs has to stay below the threshold.
+CONFIRM_RUNS = 3
+# Sweeps whose per-case median is saved as the baseline; a single sweep can
+# land on a slow or fast moment and skew every later comparison.
+BASELINE_SWEEPS = 3
+
+DEFAULT_BASELINE_PATH = Path("benchmarks") / "feature_extraction.json"
+
+INPUT_TEMPLATES = [
+    ("text", "username", "Username or email", "username"),
+    ("password", "password", "Password", "current-password"),
+    ("email", "email", "Email address", "email"),
+    ("tel", "otp_code", "6-digit code", "one-time-code"),
+    ("text", "first_name", "First name", "given-name"),
+    ("search", "q", "Search...", "off"),
+]
+
+
+def generate_scaling_page(
+    inputs_per_form: int, forms: int, depth: int, padding_kb: int
+) -> str:
+    parts = ["<html><head><title>Synthetic</title></head><body>"]
+
+    filler = "<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p>"
+    parts.append(filler * (padding_kb * 1024 // len(filler)))
+
+    for form_index in range(forms):
+        parts.append(f'<form action="/login/{form_index}" method="post">')
+        parts.append("".join(f'<div class="wrap-{d}">' for d in range(depth)))
+        for input_index in range(inputs_per_form):
+            input_type, name, placeholder, autocomplete = INPUT_TEMPLATES[
+                input_index % len(INPUT_TEMPLATES)
+            ]
+            parts.append(
+                f'<label for="f{form_index}-{input_index}">{placeholder}</label>'
+                f'<input type="{input_type}" name="{name}" '
+                f'id="f{form_index}-{input_index}" placeholder="{placeholder}" '
+                f'autocomplete="{autocomplete}" />'
+            )
+        parts.append("</div>" * depth)
+        parts.append('<button type="submit">Continue</button></form>')
+
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def available_parsers() -> List[str]:
+    from bs4 import BeautifulSoup, FeatureNotFound
+
+    parsers = []
+    for parser in PARSER_BACKENDS:
+        try:
+            BeautifulSoup("<p></p>", parser)
+        except FeatureNotFound:
+            continue
+        parsers.append(parser)
+    return parsers
+
+
+def benchmark_extraction(
+    html: str, parser: str, code_path: str, min_time: float = 1.0
+) -> Dict[str, float]:
+    clear_score_cache()
+    fields = len(extract_features_from_html(html, parser))
+
+    # Median of several rounds, each at least MIN_RUNS_PER_ROUND pages long:
+    # a single slow or fast round cannot move the reported figure. The
+    # interquartile spread of the rounds is reported as a noise indicator.
+    round_ms: List[float] = []
+    runs = 0
+    for _ in range(TIMING_ROUNDS):
+        round_runs = 0
+        elapsed = 0.0
+        while elapsed < min_time / TIMING_ROUNDS or round_runs < MIN_RUNS_PER_ROUND:
+            if code_path == "cold":
+                clear_score_cache()
+            start = time.perf_counter()
+            extract_features_from_html(html, parser)
+            elapsed += time.perf_counter() - start
+            round_runs += 1
+        round_ms.append(elapsed / round_runs * 1000)
+        runs += round_runs
+
+    median_ms = statistics.median(round_ms)
+    q1, _, q3 = statistics.quantiles(round_ms, n=4)
+
+    if code_path == "cold":
+        clear_score_cache()
+    tracemalloc.start()
+    extract_features_from_html(html, parser)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "fields": fields,
+        "runs": runs,
+        "ms_per_page": median_ms,
+        "spread": (q3 - q1) / median_ms if median_ms else 0.0,
+        "fields_per_sec": fields / median_ms * 1000 if median_ms else 0.0,
+        "peak_kb": peak / 1024,
+    }
+
+
+def run_feature_sweep(min_time: float = 1.0) -> List[Dict[str, Any]]:
+    results = []
+    parsers = available_parsers()
+
+    for dimension, values in SWEEPS.items():
+        for value in values:
+            page = dict(BASE_PAGE, **{dimension: value})
+            html = generate_scaling_page(**page)
+            for parser in parsers:
+                for code_path in CODE_PATHS:
+                    result = benchmark_extraction(html, parser, code_path, min_time)
+                    results.append(
+                        {
+                            "dimension": dimension,
+                            "value": value,
+                            "parser": parser,
+                            "path": code_path,
+                            "page_kb": len(html) / 1024,
+                            **result,
+                        }
+                    )
+
+    return results
+
+
+def median_sweep(sweeps: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Combine repeated sweeps case by case, keeping each case's median run."""
+    combined = []
+    for runs in zip(*sweeps):
+        ordered = sorted(runs, key=lambda result: result["fields_per_sec"])
+        combined.append(ordered[len(ordered) // 2])
+    return combined
+
+
+def _case_key(result: Dict[str, Any]) -> str:
+    return f"{result['dimension']}={result['value']}/{result['parser']}/{result['path']}"
+
+
+def _remeasure(result: Dict[str, Any], min_time: float) -> float:
+    page = dict(BASE_PAGE, **{result["dimension"]: result["value"]})
+    html = generate_scaling_page(**page)
+    return benchmark_extraction(html, result["parser"], result["path"], min_time)[
+        "fields_per_sec"
+    ]
+
+
+def compare_to_baseline(
+    results: List[Dict[str, Any]],
+    baseline: List[Dict[str, Any]],
+    tolerance: float = 0.3,
+    remeasure: Optional[Callable[[Dict[str, Any]], float]] = None,
+) -> List[str]:
+    previous = {_case_key(result): result for result in baseline}
+    regressions = []
+
+    for result in results:
+        base = previous.get(_case_key(result))
+        if base is None or not base["fields_per_sec"]:
+            continue
+        fields_per_sec = result["fields_per_sec"]
+        if fields_per_sec / base["fields_per_sec"] - 1 >= -tolerance:
+            continue
+        # The threshold never widens with noise; instead a case past it is
+        # re-timed and judged on the median of all its runs, so a transient
+        # stall is not reported but a sustained slowdown is.
+        if remeasure is not None:
+            runs = [fields_per_sec] + [remeasure(result) for _ in range(CONFIRM_RUNS)]
+            fields_per_sec = statistics.median(runs)
+        change = fields_per_sec / base["fields_per_sec"] - 1
+        if change < -tolerance:
+            regressions.append(
+                f"{_case_key(result)}: {base['fields_per_sec']:.0f} -> "
+                f"{fields_per_sec:.0f} fields/s ({change:+.1%})"
+            )
+
+    return regressions
+
+
+def print_feature_report(results: List[Dict[str, Any]]):
+    print(
+        f"{'case':<26} {'parser':<12} {'path':<5} {'page KB':>8} {'fields':>7} "
+        f"{'ms/page':>9} {'spread':>7} {'fields/s':>10} {'peak KB':>9}"
+    )
+    for result in results:
+        case = f"{result['dimension']}={result['value']}"
+        print(
+            f"{case:<26} {result['parser']:<12} {result['path']:<5} "
+            f"{result['page_kb']:>8.1f} {result['fields']:>7} "
+            f"{result['ms_per_page']:>9.3f} {result.get('spread', 0.0):>7.1%} "
+            f"{result['fields_per_sec']:>10.0f} "
+            f"{result['peak_kb']:>9.1f}"
+        )
+
+
+def benchmark_model_startup(model_path: str, runs: int = 20) -> Dict[str, float]:
+    import numpy as np
+    import onnxruntime as ort
+
+    sample = np.zeros((1, len(FieldFeatures.feature_names())), dtype=np.float32)
+    create_ms: List[float] = []
+    first_ms: List[float] = []
+    steady_ms: List[float] = []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        create_ms.append((time.perf_counter() - start) * 1000)
+
+        input_name = session.get_inputs()[0].name
+        start = time.perf_counter()
+        session.run(None, {input_name: sample})
+        first_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        session.run(None, {input_name: sample})
+        steady_ms.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "size_kb": Path(model_path).stat().st_size / 1024,
+        "create_ms": statistics.median(create_ms),
+        "first_inference_ms": statistics.median(first_ms),
+        "steady_inference_ms": statistics.median(steady_ms),
+    }
+
+
+def print_model_startup_report(models_dir: Path, runs: int):
+    print(
+        f"{'model':<24} {'size KB':>9} {'create ms':>10} "
+        f"{'first ms':>9} {'steady ms':>10}"
+    )
+    for variant in MODEL_VARIANTS:
+        model_path = models_dir / variant
+        if not model_path.exists():
+            print(f"{variant:<24} missing")
+            continue
+        result = benchmark_model_startup(str(model_path), runs=runs)
+        print(
+            f"{variant:<24} {result['size_kb']:>9.2f} {result['create_ms']:>10.3f} "
+            f"{result['first_inference_ms']:>9.3f} "
+            f"{result['steady_inference_ms']:>10.3f}"
+        )
+
+
+def run_features_command(
+    baseline_path: Path, save_baseline: bool, tolerance: float, min_time: float
+) -> int:
+    print("=== Feature extraction benchmark ===\n")
+    sweeps = BASELINE_SWEEPS if save_baseline else 1
+    results = median_sweep([run_feature_sweep(min_time=min_time) for _ in range(sweeps)])
+    print_feature_report(results)
+
+    if save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print(
+            f"\nNo baseline at {baseline_path}. Baselines are machine-specific and "
+            "not committed: run with --save-baseline on the code to compare against "
+            "first"
+        )
+        return 0
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = compare_to_baseline(
+        results,
+        baseline,
+        tolerance=tolerance,
+        remeasure=lambda result: _remeasure(result, min_time),
+    )
+    if regressions:
+        print(f"\nThroughput regressions vs {baseline_path}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+
+    print(f"\nNo regressions beyond {tolerance:.0%} vs {baseline_path}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    model_parser = subparsers.add_parser("model", help="Model startup cost")
+    model_parser.add_argument("--models-dir", type=Path, default=Path("models"))
+    model_parser.add_argument("--runs", type=int, default=20)
+
+    features_parser = subparsers.add_parser(
+        "features", help="Feature extraction throughput"
+    )
+    features_parser.add_argument(
+        "--baseline", type=Path, default=DEFAULT_BASELINE_PATH
+    )
+    features_parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Overwrite the baseline with this run instead of comparing",
+    )
+    features_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.3,
+        help="Allowed fields/sec drop before flagging a regression (default 0.3)",
+    )
+    features_parser.add_argument(
+        "--min-time",
+        type=float,
+        default=1.0,
+        help="Seconds spent timing each case (default 1.0)",
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command == "model":
+        print("=== Model startup benchmark ===\n")
+        print_model_startup_report(args.models_dir, args.runs)
+    else:
+        sys.exit(
+            run_features_command(
+                args.baseline, args.save_baseline, args.tolerance, args.min_time
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
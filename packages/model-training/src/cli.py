@@ -0,0 +1,766 @@
+"""Command-line entry point for the form detection training toolkit.
+
+Each subcommand imports its heavy dependencies (bs4, numpy, xgboost,
+sklearn, onnx, onnxruntime) only when it runs, so ``--help`` and
+lightweight commands start in well under a second.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+DEFAULT_BASE_DATA = "data/processed/base_data.json"
+DEFAULT_TRAINING_DATA = "data/processed/training_data.json"
+DEFAULT_MODEL = "models/form_detector.json"
+DEFAULT_ONNX_MODEL = "models/form_detector.onnx"
+
+# A real, cheap invocation of every subcommand, in dependency order, run by
+# import-report against a throwaway directory ({tmp}). The imports each one
+# actually performs are read back from ``python -X importtime``.
+REPORT_INVOCATIONS: List[Tuple[str, List[str]]] = [
+    ("build", ["build", "--output", "{tmp}/base_data.json"]),
+    (
+        "augment",
+        [
+            "augment",
+            "--input",
+            "{tmp}/base_data.json",
+            "--output",
+            "{tmp}/training_data.json",
+        ],
+    ),
+    ("synth", ["synth", "--pages", "5", "--output", "{tmp}/synthetic_data.jsonl"]),
+    (
+        "stats",
+        ["stats", "{tmp}/training_data.json", "--output", "{tmp}/training.stats.json"],
+    ),
+    ("drift", ["drift", "{tmp}/base_data.json", "{tmp}/training_data.json"]),
+    (
+        "train",
+        [
+            "train",
+            "--data",
+            "{tmp}/training_data.json",
+            "--model-output",
+            "{tmp}/form_detector.json",
+        ],
+    ),
+    ("quick", ["quick", "--data", "{tmp}/training_data.json", "--budget", "1"]),
+    (
+        "export",
+        [
+            "export",
+            "--model",
+            "{tmp}/form_detector.json",
+            "--data",
+            "{tmp}/training_data.json",
+            "--output",
+            "{tmp}/form_detector.onnx",
+        ],
+    ),
+    (
+        "verify",
+        [
+            "verify",
+            "--model",
+            "{tmp}/form_detector.json",
+            "--onnx",
+            "{tmp}/form_detector.onnx",
+            "--data",
+            "{tmp}/training_data.json",
+        ],
+    ),
+    ("extract", ["extract", "{tmp}/corpus", "--output-dir", "{tmp}/extracted"]),
+    (
+        "mine",
+        [
+            "mine",
+            "{tmp}/corpus",
+            "--model",
+            "{tmp}/form_detector.onnx",
+            "--output",
+            "{tmp}/uncertain_fields.jsonl",
+        ],
+    ),
+    ("bench", ["bench", "model", "--models-dir", "{tmp}", "--runs", "1"]),
+    ("ledger", ["ledger", "--ledger", "{tmp}/ledger.jsonl", "list"]),
+]
+
+# Commands whose real invocation, not just --help, must fit the cold-start
+# budget: they do light bookkeeping and are run interactively.
+LIGHTWEIGHT_COMMANDS = {"stats", "drift", "ledger"}
+
+REPORT_CORPUS_PAGE = (
+    '<form><input type="email" name="email" placeholder="Email">'
+    '<input type="password" name="password"></form>'
+)
+
+# Subcommands that forward their arguments to an existing script's main().
+PASSTHROUGH_COMMANDS = {"bench", "mine", "ledger"}
+
+COLD_START_BUDGET_MS = 300.0
+
+SPARSE_HELP = "Use the CSR .npz dataset instead of dense JSON"
+TOLERANCE_HELP = "Max allowed absolute probability error per row"
+DEFAULT_TOLERANCE = 1e-5
+
+
+def _data_path(path: str, sparse: bool) -> str:
+    if sparse and path.endswith(".json"):
+        return path[: -len(".json")] + ".npz"
+    return path
+
+
+def _save_samples(samples, path: str):
+    from dataset import save_dataset, save_dataset_sparse
+    from dataset_stats import collect_sample_stats, dataset_fingerprint, stats_path_for
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    sizes = None
+    if path.endswith(".npz"):
+        sizes = save_dataset_sparse(samples, path)
+    else:
+        save_dataset(samples, path)
+
+    # Written after the dataset so the sidecar records its final size and mtime.
+    stats = collect_sample_stats(samples)
+    stats.source = dataset_fingerprint(Path(path))
+    stats_path = stats_path_for(Path(path))
+    stats.save(stats_path)
+    print(f"Dataset statistics saved to {stats_path}")
+
+    if sizes is None:
+        return
+
+    memory_saved = 1 - sizes["csr_bytes"] / max(sizes["dense_bytes"], 1)
+    disk_saved = 1 - sizes["disk_bytes"] / max(sizes["dense_bytes"], 1)
+    print(
+        f"CSR in memory: {sizes['csr_bytes'] / 1024:.1f} KB vs "
+        f"{sizes['dense_bytes'] / 1024:.1f} KB dense float32 ({memory_saved:.1%} saved)"
+    )
+    print(
+        f"On disk: {sizes['disk_bytes'] / 1024:.1f} KB compressed CSR vs "
+        f"{sizes['dense_bytes'] / 1024:.1f} KB dense float32 ({disk_saved:.1%} saved)"
+    )
+    json_path = path[: -len(".npz")] + ".json"
+    if Path(json_path).exists():
+        json_kb = Path(json_path).stat().st_size / 1024
+        print(f"Dense JSON dataset at {json_path}: {json_kb:.1f} KB")
+
+
+def cmd_extract(args):
+    from extract import remove_extraction_output, run_extraction
+
+    output_dir = Path(args.output_dir)
+    if args.restart and output_dir.exists():
+        removed = remove_extraction_output(output_dir)
+        print(f"Removed {removed} files from the previous extraction in {output_dir}")
+
+    try:
+        checkpoint = run_extraction(
+            Path(args.corpus),
+            output_dir,
+            checkpoint_every=args.checkpoint_every,
+            parser=args.parser,
+            report_interval=args.report_interval,
+            count_total=not args.no_eta,
+        )
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(
+        f"Extracted {checkpoint.fields} fields from {checkpoint.documents} documents "
+        f"into {len(checkpoint.chunks)} chunks in {output_dir}"
+    )
+
+
+def cmd_build(args):
+    from dataset import build_dataset
+    from features import score_cache_stats
+    from ledger import record_metric
+
+    output = _data_path(args.output, args.sparse)
+    print("Building dataset from test sites...")
+    samples = build_dataset()
+    _save_samples(samples, output)
+
+    cache = score_cache_stats()
+    print(f"Base samples: {len(samples)}")
+    print(
+        f"Attribute score cache: {cache['hits']} hits, {cache['misses']} misses "
+        f"({cache['hit_rate']:.1%} hit rate)"
+    )
+    print(f"Dataset saved to {output}")
+    record_metric("base_samples", len(samples))
+
+
+def cmd_augment(args):
+    from dataset import augment_dataset, load_samples
+    from ledger import record_metric
+
+    input_path = _data_path(args.input, args.sparse)
+    output = _data_path(args.output, args.sparse)
+    samples = load_samples(input_path)
+    print(f"Loaded {len(samples)} samples from {input_path}")
+
+    augmented = augment_dataset(samples, target_size=args.target_size)
+    label_counts: Dict[str, int] = {}
+    for sample in augmented:
+        label_counts[sample.label] = label_counts.get(sample.label, 0) + 1
+
+    _save_samples(augmented, output)
+    print(f"Total samples after augmentation: {len(augmented)}")
+    print(f"Label distribution: {label_counts}")
+    print(f"Dataset saved to {output}")
+    record_metric("samples", len(augmented))
+
+
+def cmd_synth(args):
+    from dataset_stats import DatasetStats, dataset_fingerprint, stats_path_for
+    from ledger import record_metric
+    from synthetic import iter_synthetic_pages, iter_synthetic_samples
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    stats = DatasetStats()
+    vectors, labels = [], []
+    samples = 0
+    start = time.perf_counter()
+
+    pages = iter_synthetic_pages(args.pages, seed=args.seed)
+    with open(output, "w") as f:
+        for sample in iter_synthetic_samples(pages, args.parser):
+            vector = sample.features.to_vector()
+            row = {
+                "features": vector.tolist(),
+                "label": sample.label,
+                "source": sample.source,
+                "element_id": sample.element_id,
+                "element_name": sample.element_name,
+            }
+            f.write(json.dumps(row) + "\n")
+            samples += 1
+
+            vectors.append(vector)
+            labels.append(sample.label)
+            if len(vectors) == 4096:
+                stats.update_batch(vectors, labels)
+                vectors, labels = [], []
+
+    if vectors:
+        stats.update_batch(vectors, labels)
+    stats.source = dataset_fingerprint(output)
+    stats_path = stats_path_for(output)
+    stats.save(stats_path)
+
+    elapsed = time.perf_counter() - start
+    print(f"Generated {samples} samples from {args.pages} pages in {elapsed:.1f}s")
+    print(f"Label distribution: {dict(sorted(stats.labels.items()))}")
+    print(f"Dataset saved to {output}")
+    print(f"Dataset statistics saved to {stats_path}")
+    record_metric("samples", samples)
+
+
+def cmd_train(args):
+    from train import run_training, save_model
+
+    model, X_test, y_test = run_training(_data_path(args.data, args.sparse))
+    Path(args.model_output).parent.mkdir(parents=True, exist_ok=True)
+    save_model(model, args.model_output)
+
+    if args.export:
+        # Same process and same in-memory test split: no second start-up
+        # paying for sklearn/xgboost, and no reload-and-resplit.
+        _export(args, model, X_test, y_test)
+
+
+def cmd_quick(args):
+    started = time.perf_counter()
+
+    from ledger import record_metric
+    from quick import print_quick_report, quick_train
+
+    try:
+        report = quick_train(
+            _data_path(args.data, args.sparse),
+            fraction=args.fraction,
+            max_rows=args.max_rows,
+            budget_s=args.budget,
+            max_rounds=args.max_rounds,
+            seed=args.seed,
+            started=started,
+        )
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print_quick_report(report)
+    record_metric("quick_rows", report.used_rows)
+    record_metric("quick_accuracy", report.accuracy)
+
+
+def cmd_export(args):
+    from train import load_dataset, load_model, split_dataset
+
+    model = load_model(args.model)
+    X, y = load_dataset(_data_path(args.data, args.sparse))
+    _, _, X_test, _, _, y_test = split_dataset(X, y)
+    _export(args, model, X_test, y_test)
+
+
+def _export(args, model, X_test, y_test):
+    from train import run_export
+
+    passed = run_export(
+        model,
+        X_test,
+        y_test,
+        args.output,
+        tolerance=args.tolerance,
+        prune=not args.no_prune,
+        leaf_tolerance=args.leaf_tolerance,
+        drop_tolerance=args.drop_tolerance,
+        max_accuracy_drop=args.max_accuracy_drop,
+    )
+    if not passed:
+        sys.exit(1)
+
+
+def cmd_verify(args):
+    from train import REVERSE_MAPPING, load_dataset, load_model
+    from verify import (
+        check_onnx_equivalence,
+        export_record_path,
+        print_equivalence_report,
+        recorded_tolerance,
+    )
+
+    tolerance = args.tolerance
+    if tolerance is None:
+        tolerance = recorded_tolerance(args.onnx)
+        if tolerance is None:
+            tolerance = DEFAULT_TOLERANCE
+        else:
+            print(
+                f"Using tolerance {tolerance:g} recorded by export in "
+                f"{export_record_path(args.onnx)}"
+            )
+
+    model = load_model(args.model)
+    X, _ = load_dataset(_data_path(args.data, args.sparse))
+    report = check_onnx_equivalence(
+        model,
+        args.onnx,
+        X,
+        tolerance=tolerance,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        max_offenders=args.max_offenders,
+    )
+    print_equivalence_report(report, REVERSE_MAPPING)
+    if not report.passed:
+        sys.exit(1)
+
+
+def _load_or_collect_stats(path: str):
+    from dataset_stats import DatasetStats, collect_stats, is_current, stats_path_for
+
+    if path.endswith(".stats.json"):
+        return DatasetStats.load(Path(path))
+    stats_path = stats_path_for(Path(path))
+    if stats_path.exists():
+        stats = DatasetStats.load(stats_path)
+        if is_current(stats, Path(path)):
+            return stats
+        print(f"{stats_path} does not match {path} on disk; re-collecting statistics")
+    return collect_stats([Path(path)])
+
+
+def cmd_stats(args):
+    from dataset_stats import (
+        collect_stats,
+        dataset_fingerprint,
+        print_stats,
+        stats_path_for,
+    )
+
+    paths = [Path(path) for path in args.datasets]
+    if len(paths) > 1 and not args.output:
+        # A default of the first shard's sidecar would later be read back as
+        # that shard's own statistics by drift.
+        print("Error: --output is required when combining several datasets")
+        sys.exit(1)
+
+    stats = collect_stats(paths)
+    if len(paths) == 1:
+        stats.source = dataset_fingerprint(paths[0])
+    print_stats(stats)
+
+    output = Path(args.output) if args.output else stats_path_for(paths[0])
+    stats.save(output)
+    print(f"\nStatistics saved to {output}")
+
+
+def cmd_drift(args):
+    from dataset_stats import diff_stats, print_drift
+
+    report = diff_stats(_load_or_collect_stats(args.old), _load_or_collect_stats(args.new))
+    print_drift(report, all_features=args.all)
+
+    drifted = any(row["drift"] for row in report["features"] + report["labels"])
+    if drifted and args.fail_on_drift:
+        sys.exit(1)
+
+
+def cmd_passthrough(args, extra: List[str]):
+    if args.command == "bench":
+        from bench import main as command_main
+    elif args.command == "mine":
+        from mine import main as command_main
+    else:
+        from ledger import main as command_main
+    command_main(extra)
+
+
+def _importtime_entries(stderr: str) -> List[Tuple[int, str, float]]:
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # the header line
+        name = name[1:]
+        level = (len(name) - len(name.lstrip(" "))) // 2
+        entries.append((level, name.strip(), int(cumulative) / 1000))
+    return entries
+
+
+def parse_importtime(stderr: str, ignored: set) -> Dict[str, float]:
+    """Sum ``-X importtime`` cumulative ms per third-party top-level package.
+
+    Only the outermost third-party import on each chain is counted, so a
+    package pulled in by another (scipy by sklearn) is charged to the latter.
+    ``ignored`` holds local and interpreter start-up modules.
+    """
+    import importlib.util
+
+    entries = _importtime_entries(stderr)
+    costs: Dict[str, float] = {}
+    # importtime prints a module after its own imports; walking the lines
+    # backwards visits every parent before its children.
+    third_party_depth: Optional[int] = None
+    for level, name, ms in reversed(entries):
+        if third_party_depth is not None and level > third_party_depth:
+            continue
+        third_party_depth = None
+        root = name.split(".")[0]
+        if root in sys.stdlib_module_names or root in ignored or name in ignored:
+            continue
+        if importlib.util.find_spec(root) is None:
+            continue  # a failed optional import probe, e.g. pickle's "org"
+        costs[root] = costs.get(root, 0.0) + ms
+        third_party_depth = level
+    return costs
+
+
+def measure_import_costs(commands: List[str]) -> List[Dict[str, object]]:
+    import tempfile
+
+    cli_path = Path(__file__).resolve()
+    # Site hooks (.pth files, sitecustomize) load on every interpreter start;
+    # they are not any command's cost.
+    startup = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "pass"],
+        capture_output=True,
+        text=True,
+    )
+    ignored = {name for _, name, _ in _importtime_entries(startup.stderr)}
+    ignored |= {path.stem for path in cli_path.parent.glob("*.py")}
+    rows = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / "corpus").mkdir()
+        (Path(tmp) / "corpus" / "login.html").write_text(REPORT_CORPUS_PAGE)
+
+        # Invocations run in order up to the last requested command, since
+        # later ones need earlier outputs; only requested ones are reported.
+        remaining = set(commands)
+        for command, argv in REPORT_INVOCATIONS:
+            if not remaining:
+                break
+            argv = [arg.format(tmp=tmp) for arg in argv]
+            start = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, "-X", "importtime", str(cli_path), *argv],
+                cwd=cli_path.parent.parent,
+                capture_output=True,
+                text=True,
+            )
+            run_ms = (time.perf_counter() - start) * 1000
+            if command not in remaining:
+                continue
+            remaining.discard(command)
+
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, str(cli_path), command, "--help"],
+                capture_output=True,
+                check=True,
+            )
+            help_ms = (time.perf_counter() - start) * 1000
+
+            costs = parse_importtime(result.stderr, ignored)
+            rows.append(
+                {
+                    "command": command,
+                    "help_ms": help_ms,
+                    "run_ms": run_ms,
+                    "ok": result.returncode == 0,
+                    "deps_ms": sum(costs.values()),
+                    "costs": costs,
+                }
+            )
+
+    return rows
+
+
+def cmd_import_report(args):
+    known = [command for command, _ in REPORT_INVOCATIONS]
+    commands = args.commands or known
+    unknown = [command for command in commands if command not in known]
+    if unknown:
+        print(f"Unknown commands: {', '.join(unknown)}")
+        sys.exit(2)
+    rows = measure_import_costs(commands)
+
+    print(
+        f"{'command':<10} {'--help ms':>10} {'run ms':>8} {'deps ms':>9}  breakdown"
+    )
+    over_budget = False
+    for row in rows:
+        breakdown = ", ".join(
+            f"{name} {ms:.0f}" for name, ms in sorted(
+                row["costs"].items(), key=lambda item: -item[1]
+            )
+        )
+        flag = ""
+        if not row["ok"]:
+            flag = "  RUN FAILED"
+        elif row["help_ms"] > COLD_START_BUDGET_MS or (
+            row["command"] in LIGHTWEIGHT_COMMANDS
+            and row["run_ms"] > COLD_START_BUDGET_MS
+        ):
+            flag = "  OVER BUDGET"
+            over_budget = True
+        print(
+            f"{row['command']:<10} {row['help_ms']:>10.0f} {row['run_ms']:>8.0f} "
+            f"{row['deps_ms']:>9.0f}  {breakdown or '-'}{flag}"
+        )
+
+    print(
+        f"\n--help ms is a cold interpreter start; budget {COLD_START_BUDGET_MS:.0f} ms."
+    )
+    lightweight = ", ".join(sorted(LIGHTWEIGHT_COMMANDS))
+    print(
+        f"run ms is a real invocation on a small fixture; {lightweight} "
+        "must also fit the budget."
+    )
+    print("deps ms is third-party import time measured with python -X importtime.")
+    if over_budget or not all(row["ok"] for row in rows):
+        sys.exit(1)
+
+
+def _add_export_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--output", default=DEFAULT_ONNX_MODEL)
+    parser.add_argument(
+        "--tolerance", type=float, default=DEFAULT_TOLERANCE, help=TOLERANCE_HELP
+    )
+    parser.add_argument("--no-prune", action="store_true", help="Skip tree pruning")
+    parser.add_argument(
+        "--leaf-tolerance",
+        type=float,
+        default=1e-3,
+        help="Collapse splits whose leaf values differ by at most this",
+    )
+    parser.add_argument(
+        "--drop-tolerance",
+        type=float,
+        default=1e-3,
+        help="Drop trees whose leaf values are all within this of zero",
+    )
+    parser.add_argument(
+        "--max-accuracy-drop",
+        type=float,
+        default=0.002,
+        help="Fail export if pruning costs more test accuracy than this",
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    extract = subparsers.add_parser(
+        "extract", help="Extract unlabeled field features from an HTML corpus"
+    )
+    extract.add_argument("corpus", help="HTML directory, HTML file or JSONL")
+    extract.add_argument("--output-dir", default="data/processed/extracted")
+    extract.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=1000,
+        help="Documents per committed chunk (default 1000)",
+    )
+    extract.add_argument(
+        "--report-interval", type=float, default=10.0, help="Seconds between progress lines"
+    )
+    extract.add_argument(
+        "--no-eta", action="store_true", help="Skip counting documents up front"
+    )
+    extract.add_argument(
+        "--restart", action="store_true", help="Discard any existing checkpoint"
+    )
+    extract.add_argument("--parser", default="html.parser")
+    extract.set_defaults(handler=cmd_extract)
+
+    build = subparsers.add_parser("build", help="Build the base labeled dataset")
+    build.add_argument("--output", default=DEFAULT_BASE_DATA)
+    build.add_argument(
+        "--sparse", action="store_true", help=SPARSE_HELP
+    )
+    build.set_defaults(handler=cmd_build)
+
+    augment = subparsers.add_parser("augment", help="Augment a built dataset")
+    augment.add_argument("--input", default=DEFAULT_BASE_DATA)
+    augment.add_argument("--output", default=DEFAULT_TRAINING_DATA)
+    augment.add_argument("--target-size", type=int, default=2000)
+    augment.add_argument(
+        "--sparse", action="store_true", help=SPARSE_HELP
+    )
+    augment.set_defaults(handler=cmd_augment)
+
+    synth = subparsers.add_parser(
+        "synth", help="Stream synthetic labeled pages through feature extraction"
+    )
+    synth.add_argument("--pages", type=int, default=10000)
+    synth.add_argument("--seed", type=int, default=0)
+    synth.add_argument("--output", default="data/processed/synthetic_data.jsonl")
+    synth.add_argument("--parser", default="html.parser")
+    synth.set_defaults(handler=cmd_synth)
+
+    train = subparsers.add_parser("train", help="Train and evaluate the model")
+    train.add_argument("--data", default=DEFAULT_TRAINING_DATA)
+    train.add_argument("--model-output", default=DEFAULT_MODEL)
+    train.add_argument(
+        "--sparse", action="store_true", help=SPARSE_HELP
+    )
+    train.add_argument(
+        "--export",
+        action="store_true",
+        help="Also export to ONNX in the same process (takes export's options)",
+    )
+    _add_export_arguments(train)
+    train.set_defaults(handler=cmd_train)
+
+    quick = subparsers.add_parser(
+        "quick", help="Time-budgeted training on a stratified subsample"
+    )
+    quick.add_argument("--data", default=DEFAULT_TRAINING_DATA)
+    quick.add_argument(
+        "--fraction", type=float, default=0.2, help="Share of each label/source stratum"
+    )
+    quick.add_argument("--max-rows", type=int, help="Hard cap on subsampled rows")
+    quick.add_argument(
+        "--budget", type=float, default=30.0, help="Wall-clock training budget in seconds"
+    )
+    quick.add_argument("--max-rounds", type=int, default=500)
+    quick.add_argument("--seed", type=int, default=42)
+    quick.add_argument("--sparse", action="store_true", help=SPARSE_HELP)
+    quick.set_defaults(handler=cmd_quick)
+
+    export = subparsers.add_parser("export", help="Export a trained model to ONNX")
+    export.add_argument("--model", default=DEFAULT_MODEL)
+    export.add_argument("--data", default=DEFAULT_TRAINING_DATA)
+    _add_export_arguments(export)
+    export.add_argument(
+        "--sparse", action="store_true", help=SPARSE_HELP
+    )
+    export.set_defaults(handler=cmd_export)
+
+    verify = subparsers.add_parser(
+        "verify", help="Check ONNX/XGBoost agreement over a whole dataset"
+    )
+    verify.add_argument("--model", default=DEFAULT_MODEL)
+    verify.add_argument("--onnx", default=DEFAULT_ONNX_MODEL)
+    verify.add_argument(
+        "--data", default=DEFAULT_TRAINING_DATA, help="Any dataset, not just the test split"
+    )
+    verify.add_argument(
+        "--tolerance",
+        type=float,
+        help=TOLERANCE_HELP + " (default: the tolerance recorded by export for "
+        f"this artifact, else {DEFAULT_TOLERANCE:g})",
+    )
+    verify.add_argument("--chunk-size", type=int, default=4096)
+    verify.add_argument("--workers", type=int, default=4)
+    verify.add_argument("--max-offenders", type=int, default=20)
+    verify.add_argument("--sparse", action="store_true", help=SPARSE_HELP)
+    verify.set_defaults(handler=cmd_verify)
+
+    stats = subparsers.add_parser(
+        "stats", help="Stream dataset shards into per-feature statistics"
+    )
+    stats.add_argument("datasets", nargs="+", help=".json, .jsonl or .npz shards")
+    stats.add_argument(
+        "--output",
+        help="Defaults to <dataset>.stats.json next to a single dataset; "
+        "required for several",
+    )
+    stats.set_defaults(handler=cmd_stats)
+
+    drift = subparsers.add_parser("drift", help="Compare two dataset builds")
+    drift.add_argument("old", help="Dataset or .stats.json of the previous build")
+    drift.add_argument("new", help="Dataset or .stats.json of the new build")
+    drift.add_argument("--all", action="store_true", help="Show every feature")
+    drift.add_argument("--fail-on-drift", action="store_true")
+    drift.set_defaults(handler=cmd_drift)
+
+    for name, help_text in [
+        ("bench", "Run benchmarks (see bench.py)"),
+        ("mine", "Mine uncertain fields from a corpus (see mine.py)"),
+        ("ledger", "Inspect the pipeline run ledger (see ledger.py)"),
+    ]:
+        passthrough = subparsers.add_parser(name, help=help_text, add_help=False)
+        passthrough.set_defaults(handler=None)
+
+    report = subparsers.add_parser(
+        "import-report", help="Report cold-start and import cost per command"
+    )
+    report.add_argument(
+        "commands", nargs="*", help="Commands to measure (default: all)"
+    )
+    report.set_defaults(handler=cmd_import_report)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+
+    if args.command in PASSTHROUGH_COMMANDS:
+        cmd_passthrough(args, extra)
+        return
+    if extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
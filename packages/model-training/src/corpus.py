@@ -0,0 +1,74 @@
+"""Lazy readers for crawled HTML corpora.
+
+A corpus is either a directory tree of ``.html``/``.htm`` files, a single
+HTML file, or a JSONL file with one ``{"source": ..., "html": ...}`` object
+per line (``url`` is accepted in place of ``source``). Pages are yielded one
+at a time so callers never hold the whole crawl in memory.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Container, Iterator, Tuple
+
+
+HTML_SUFFIXES = {".html", ".htm"}
+
+
+def iter_pages(path: Path) -> Iterator[Tuple[str, str]]:
+    for _, source, html in iter_documents(path):
+        yield source, html
+
+
+def iter_documents(
+    path: Path, skip: Container[str] = ()
+) -> Iterator[Tuple[str, str, str]]:
+    """Yield (document key, source, html), skipping keys in ``skip``.
+
+    The key is stable across runs and unique within the corpus (relative
+    path, or file name and line number for JSONL), so it can be recorded in
+    checkpoints even when a crawl repeats the same URL.
+    """
+    path = Path(path)
+
+    if path.is_dir():
+        for page_path in _walk_html_files(path):
+            key = str(page_path.relative_to(path))
+            if key not in skip:
+                yield key, key, _read_html(page_path)
+    elif path.suffix.lower() == ".jsonl":
+        with open(path) as f:
+            for line_number, line in enumerate(f, start=1):
+                key = f"{path.name}:{line_number}"
+                if not line.strip() or key in skip:
+                    continue
+                page = json.loads(line)
+                source = page.get("source") or page.get("url") or key
+                yield key, source, page["html"]
+    elif path.name not in skip:
+        yield path.name, path.name, _read_html(path)
+
+
+def count_documents(path: Path) -> int:
+    path = Path(path)
+
+    if path.is_dir():
+        return sum(1 for _ in _walk_html_files(path))
+    if path.suffix.lower() == ".jsonl":
+        with open(path) as f:
+            return sum(1 for line in f if line.strip())
+    return 1
+
+
+def _walk_html_files(root: Path) -> Iterator[Path]:
+    # os.walk keeps only one directory listing in memory at a time, unlike
+    # sorted(rglob()), which would materialize every path in the crawl.
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if Path(filename).suffix.lower() in HTML_SUFFIXES:
+                yield Path(dirpath) / filename
+
+
+def _read_html(path: Path) -> str:
+    return path.read_text(encoding="utf-8", errors="replace")
@@ -4,10 +4,13 @@ Extracts data from existing test sites and generates synthetic variations.
 """
 
 import json
+import os
 import random
+from array import array
 from typing import List, Dict, Any
 from dataclasses import dataclass
-from features import FieldFeatures, extract_features_from_html
+from features import FieldFeatures, extract_features_from_html, score_cache_stats
+from ledger import record_metric
 
 
 @dataclass
@@ -386,6 +389,25 @@ def augment_dataset(
     return augmented
 
 
+def load_samples(path: str) -> List[TrainingSample]:
+    if path.endswith(".npz"):
+        return _load_samples_sparse(path)
+
+    with open(path) as f:
+        data = json.load(f)
+
+    return [
+        TrainingSample(
+            features=FieldFeatures.from_vector(row["features"]),
+            label=row["label"],
+            source=row["source"],
+            element_id=row.get("element_id", ""),
+            element_name=row.get("element_name", ""),
+        )
+        for row in data
+    ]
+
+
 def save_dataset(samples: List[TrainingSample], path: str):
     data = []
     for sample in samples:
@@ -402,10 +424,97 @@ def save_dataset(samples: List[TrainingSample], path: str):
         json.dump(data, f, indent=2)
 
 
+def save_dataset_sparse(samples: List[TrainingSample], path: str) -> Dict[str, int]:
+    """Save samples as a CSR matrix plus label/metadata columns in one .npz.
+
+    Rows are appended from each sample's nonzero entries into typed arrays
+    (4 bytes per value and per column index), so neither the dense matrix nor
+    per-entry Python objects are ever held. Returns byte counts for the CSR
+    and dense layouts.
+    """
+    import numpy as np
+
+    data = array("f")
+    indices = array("i")
+    indptr = array("q", [0])
+    for sample in samples:
+        for index, value in sample.features.to_sparse_entries():
+            indices.append(index)
+            data.append(value)
+        indptr.append(len(indices))
+
+    num_features = len(FieldFeatures.feature_names())
+    arrays = {
+        "data": np.frombuffer(data, dtype=np.float32),
+        "indices": np.frombuffer(indices, dtype=np.int32),
+        "indptr": np.frombuffer(indptr, dtype=np.int64),
+        "shape": np.asarray([len(samples), num_features], dtype=np.int64),
+    }
+    np.savez_compressed(
+        path,
+        **arrays,
+        labels=np.asarray([s.label for s in samples]),
+        sources=np.asarray([s.source for s in samples]),
+        element_ids=np.asarray([s.element_id for s in samples]),
+        element_names=np.asarray([s.element_name for s in samples]),
+    )
+
+    return {
+        "csr_bytes": sum(
+            arrays[key].nbytes for key in ("data", "indices", "indptr")
+        ),
+        "dense_bytes": len(samples) * num_features * 4,
+        "disk_bytes": os.path.getsize(path),
+    }
+
+
+def load_sparse_arrays(path: str):
+    import numpy as np
+    from scipy import sparse
+
+    with np.load(path) as archive:
+        X = sparse.csr_matrix(
+            (archive["data"], archive["indices"], archive["indptr"]),
+            shape=tuple(archive["shape"]),
+        )
+        columns = {
+            key: archive[key]
+            for key in ("labels", "sources", "element_ids", "element_names")
+        }
+    return X, columns
+
+
+def _load_samples_sparse(path: str) -> List[TrainingSample]:
+    X, columns = load_sparse_arrays(path)
+    indptr, indices, data = X.indptr, X.indices, X.data
+    num_features = X.shape[1]
+    samples = []
+    for row in range(X.shape[0]):
+        start, end = indptr[row], indptr[row + 1]
+        vector = [0.0] * num_features
+        for index, value in zip(indices[start:end].tolist(), data[start:end].tolist()):
+            vector[index] = value
+        samples.append(
+            TrainingSample(
+                features=FieldFeatures.from_vector(vector),
+                label=str(columns["labels"][row]),
+                source=str(columns["sources"][row]),
+                element_id=str(columns["element_ids"][row]),
+                element_name=str(columns["element_names"][row]),
+            )
+        )
+    return samples
+
+
 if __name__ == "__main__":
     print("Building dataset from test sites...")
     samples = build_dataset()
     print(f"Base samples: {len(samples)}")
+    cache = score_cache_stats()
+    print(
+        f"Attribute score cache: {cache['hits']} hits, {cache['misses']} misses "
+        f"({cache['hit_rate']:.1%} hit rate)"
+    )
 
     print("Augmenting dataset...")
     augmented = augment_dataset(samples, target_size=2000)
@@ -415,6 +524,8 @@ if __name__ == "__main__":
     for s in augmented:
         label_counts[s.label] = label_counts.get(s.label, 0) + 1
     print(f"Label distribution: {label_counts}")
+    record_metric("base_samples", len(samples))
+    record_metric("samples", len(augmented))
 
     save_dataset(augmented, "data/processed/training_data.json")
     print("Dataset saved to data/processed/training_data.json")
@@ -0,0 +1,349 @@
+"""Single-pass streaming statistics for datasets and drift between builds.
+
+Rows are consumed in fixed-size batches and folded into per-feature running
+moments (Welford/Chan), nonzero counts and fixed-bin histograms, so the
+accumulated state does not grow with the number of rows or shards. JSON and
+JSONL shards are decoded one row at a time. A ``.npz`` shard's compressed CSR
+arrays can only be loaded whole, so its CSR size bounds peak memory, but rows
+are still densified a batch at a time. Statistics are persisted next to the
+dataset as ``<dataset>.stats.json``.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from features import FieldFeatures
+
+
+# Every feature is normalized to roughly [0, 1]; lengths and sibling counts
+# can exceed 1, which the last bin collects.
+HISTOGRAM_EDGES = [i / 10 for i in range(11)]
+NUM_BINS = len(HISTOGRAM_EDGES)
+
+BATCH_SIZE = 4096
+
+JSON_READ_SIZE = 1 << 16
+
+MEAN_SHIFT_THRESHOLD = 0.25  # in pooled standard deviations
+NONZERO_SHIFT_THRESHOLD = 0.05  # absolute change in nonzero fraction
+LABEL_SHIFT_THRESHOLD = 0.05  # absolute change in label share
+PSI_THRESHOLD = 0.2
+
+
+class DatasetStats:
+    def __init__(self, feature_names: Optional[List[str]] = None):
+        self.feature_names = feature_names or FieldFeatures.feature_names()
+        num_features = len(self.feature_names)
+        self.count = 0
+        self.mean = [0.0] * num_features
+        self.m2 = [0.0] * num_features
+        self.nonzero = [0] * num_features
+        self.histograms = [[0] * NUM_BINS for _ in range(num_features)]
+        self.labels: Dict[str, int] = {}
+        # Size and mtime of the dataset file these statistics describe, so a
+        # sidecar left behind by an older build can be told apart.
+        self.source: Optional[Dict[str, int]] = None
+
+    def update_batch(self, X, labels: Sequence[Optional[str]]):
+        import numpy as np
+
+        X = np.asarray(X, dtype=np.float64)
+        if len(X) == 0:
+            return
+
+        batch_count = len(X)
+        batch_mean = X.mean(axis=0)
+        batch_m2 = ((X - batch_mean) ** 2).sum(axis=0)
+
+        # Chan et al. pairwise combination of (count, mean, M2).
+        total = self.count + batch_count
+        delta = batch_mean - np.asarray(self.mean)
+        mean = np.asarray(self.mean) + delta * batch_count / total
+        m2 = np.asarray(self.m2) + batch_m2 + delta**2 * self.count * batch_count / total
+
+        self.count = total
+        self.mean = mean.tolist()
+        self.m2 = m2.tolist()
+
+        nonzero = (X != 0).sum(axis=0)
+        bins = np.clip(
+            np.digitize(X, HISTOGRAM_EDGES[1:-1], right=False), 0, NUM_BINS - 2
+        )
+        bins[X > HISTOGRAM_EDGES[-1]] = NUM_BINS - 1
+        for feature in range(X.shape[1]):
+            self.nonzero[feature] += int(nonzero[feature])
+            counts = np.bincount(bins[:, feature], minlength=NUM_BINS)
+            histogram = self.histograms[feature]
+            for b in range(NUM_BINS):
+                histogram[b] += int(counts[b])
+
+        for label in labels:
+            key = label if label is not None else "unlabeled"
+            self.labels[key] = self.labels.get(key, 0) + 1
+
+    def variance(self, feature: int) -> float:
+        return self.m2[feature] / (self.count - 1) if self.count > 1 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "count": self.count,
+            "labels": dict(sorted(self.labels.items())),
+            "histogram_edges": HISTOGRAM_EDGES,
+            "features": {
+                name: {
+                    "mean": self.mean[i],
+                    "variance": self.variance(i),
+                    "m2": self.m2[i],
+                    "nonzero": self.nonzero[i],
+                    "histogram": self.histograms[i],
+                }
+                for i, name in enumerate(self.feature_names)
+            },
+        }
+        if self.source is not None:
+            data["source"] = self.source
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DatasetStats":
+        stats = cls(list(data["features"]))
+        stats.count = data["count"]
+        stats.labels = dict(data["labels"])
+        stats.source = data.get("source")
+        for i, name in enumerate(stats.feature_names):
+            feature = data["features"][name]
+            stats.mean[i] = feature["mean"]
+            stats.m2[i] = feature["m2"]
+            stats.nonzero[i] = feature["nonzero"]
+            stats.histograms[i] = list(feature["histogram"])
+        return stats
+
+    def save(self, path: Path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: Path) -> "DatasetStats":
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def stats_path_for(dataset_path: Path) -> Path:
+    dataset_path = Path(dataset_path)
+    return dataset_path.with_name(dataset_path.name + ".stats.json")
+
+
+def dataset_fingerprint(dataset_path: Path) -> Dict[str, int]:
+    stat = Path(dataset_path).stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def is_current(stats: DatasetStats, dataset_path: Path) -> bool:
+    """Whether ``stats`` were collected from the dataset as it is on disk now."""
+    return stats.source == dataset_fingerprint(dataset_path)
+
+
+def _iter_json_array(f, read_size: int = JSON_READ_SIZE) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array without loading it whole."""
+    decoder = json.JSONDecoder()
+    whitespace = " \t\r\n"
+    buffer = ""
+    pos = 0
+    eof = False
+    started = False
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in whitespace:
+            pos += 1
+
+        if pos < len(buffer):
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("expected a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+            if buffer[pos] == ",":
+                pos += 1
+                continue
+
+            # An element only counts as complete once the next token is a
+            # separator; otherwise a number split across reads decodes short.
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                follow = end
+                while follow < len(buffer) and buffer[follow] in whitespace:
+                    follow += 1
+                if follow < len(buffer) and buffer[follow] in ",]":
+                    yield item
+                    pos = follow
+                    continue
+
+        if eof:
+            raise ValueError("unterminated JSON array")
+        chunk = f.read(read_size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+def iter_rows(path: Path) -> Iterator[Tuple[Sequence[float], Optional[str]]]:
+    path = Path(path)
+
+    if path.suffix == ".npz":
+        from dataset import load_sparse_arrays
+
+        X, columns = load_sparse_arrays(str(path))
+        for start in range(0, X.shape[0], BATCH_SIZE):
+            block = X[start : start + BATCH_SIZE].toarray()
+            for offset, vector in enumerate(block):
+                yield vector, str(columns["labels"][start + offset])
+    elif path.suffix == ".jsonl":
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    yield row["features"], row.get("label")
+    else:
+        with open(path) as f:
+            for row in _iter_json_array(f):
+                yield row["features"], row.get("label")
+
+
+def collect_stats(paths: Sequence[Path], batch_size: int = BATCH_SIZE) -> DatasetStats:
+    stats = DatasetStats()
+    vectors: List[Sequence[float]] = []
+    labels: List[Optional[str]] = []
+
+    for path in paths:
+        for vector, label in iter_rows(path):
+            vectors.append(vector)
+            labels.append(label)
+            if len(vectors) == batch_size:
+                stats.update_batch(vectors, labels)
+                vectors, labels = [], []
+
+    if vectors:
+        stats.update_batch(vectors, labels)
+
+    return stats
+
+
+def collect_sample_stats(samples, batch_size: int = BATCH_SIZE) -> DatasetStats:
+    stats = DatasetStats()
+    for start in range(0, len(samples), batch_size):
+        batch = samples[start : start + batch_size]
+        stats.update_batch(
+            [sample.features.to_vector() for sample in batch],
+            [sample.label for sample in batch],
+        )
+    return stats
+
+
+def _psi(old: Sequence[int], new: Sequence[int]) -> float:
+    import math
+
+    old_total = sum(old) or 1
+    new_total = sum(new) or 1
+    psi = 0.0
+    for old_count, new_count in zip(old, new):
+        p = max(old_count / old_total, 1e-6)
+        q = max(new_count / new_total, 1e-6)
+        psi += (q - p) * math.log(q / p)
+    return psi
+
+
+def diff_stats(old: DatasetStats, new: DatasetStats) -> Dict[str, Any]:
+    import math
+
+    labels = []
+    for label in sorted(set(old.labels) | set(new.labels)):
+        old_share = old.labels.get(label, 0) / max(old.count, 1)
+        new_share = new.labels.get(label, 0) / max(new.count, 1)
+        labels.append(
+            {
+                "label": label,
+                "old_share": old_share,
+                "new_share": new_share,
+                "drift": abs(new_share - old_share) > LABEL_SHIFT_THRESHOLD,
+            }
+        )
+
+    features = []
+    old_index = {name: i for i, name in enumerate(old.feature_names)}
+    for j, name in enumerate(new.feature_names):
+        i = old_index.get(name)
+        if i is None:
+            continue
+        pooled_std = math.sqrt((old.variance(i) + new.variance(j)) / 2)
+        mean_shift = new.mean[j] - old.mean[i]
+        standardized = mean_shift / pooled_std if pooled_std else 0.0
+        old_nonzero = old.nonzero[i] / max(old.count, 1)
+        new_nonzero = new.nonzero[j] / max(new.count, 1)
+        psi = _psi(old.histograms[i], new.histograms[j])
+        features.append(
+            {
+                "feature": name,
+                "old_mean": old.mean[i],
+                "new_mean": new.mean[j],
+                "std_mean_shift": standardized,
+                "old_nonzero": old_nonzero,
+                "new_nonzero": new_nonzero,
+                "psi": psi,
+                "drift": abs(standardized) > MEAN_SHIFT_THRESHOLD
+                or abs(new_nonzero - old_nonzero) > NONZERO_SHIFT_THRESHOLD
+                or psi > PSI_THRESHOLD,
+            }
+        )
+
+    return {
+        "old_count": old.count,
+        "new_count": new.count,
+        "labels": labels,
+        "features": features,
+    }
+
+
+def print_stats(stats: DatasetStats):
+    print(f"Rows: {stats.count}")
+    print(f"Label distribution: {dict(sorted(stats.labels.items()))}")
+    print(f"{'feature':<24} {'mean':>8} {'std':>8} {'nonzero':>8}")
+    for i, name in enumerate(stats.feature_names):
+        nonzero = stats.nonzero[i] / max(stats.count, 1)
+        std = stats.variance(i) ** 0.5
+        print(f"{name:<24} {stats.mean[i]:>8.4f} {std:>8.4f} {nonzero:>8.1%}")
+
+
+def print_drift(report: Dict[str, Any], all_features: bool = False):
+    print(f"Rows: {report['old_count']} -> {report['new_count']}\n")
+
+    print(f"{'label':<12} {'old':>8} {'new':>8}")
+    for row in report["labels"]:
+        flag = "  DRIFT" if row["drift"] else ""
+        print(
+            f"{row['label']:<12} {row['old_share']:>8.1%} {row['new_share']:>8.1%}{flag}"
+        )
+
+    print(
+        f"\n{'feature':<24} {'old mean':>9} {'new mean':>9} {'shift sd':>9} "
+        f"{'old nz':>7} {'new nz':>7} {'psi':>7}"
+    )
+    for row in report["features"]:
+        if not (all_features or row["drift"]):
+            continue
+        flag = "  DRIFT" if row["drift"] else ""
+        print(
+            f"{row['feature']:<24} {row['old_mean']:>9.4f} {row['new_mean']:>9.4f} "
+            f"{row['std_mean_shift']:>+9.2f} {row['old_nonzero']:>7.1%} "
+            f"{row['new_nonzero']:>7.1%} {row['psi']:>7.3f}{flag}"
+        )
+
+    drifted = sum(row["drift"] for row in report["features"])
+    print(f"\n{drifted} of {len(report['features'])} features drifted")
@@ -0,0 +1,217 @@
+"""Checkpointed, resumable feature extraction over large HTML corpora.
+
+Extracted rows are buffered and flushed as numbered JSONL chunks. A chunk
+and the list of documents it covers are written to temporary files and
+renamed into place, then ``checkpoint.json`` is atomically replaced to
+record them; that replace is the commit point. On restart, committed
+documents are skipped, uncommitted part files are discarded, and work
+resumes from the last checkpoint, so rerunning the same command after a
+crash or preemption never duplicates or loses rows.
+"""
+
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from corpus import count_documents, iter_documents
+from features import extract_features_from_html
+
+
+CHECKPOINT_FILE = "checkpoint.json"
+
+# Every file this module writes into the output directory, including the
+# temporaries behind _write_atomic. Anything else (stats sidecars, notes,
+# other datasets) belongs to someone else and is never touched.
+PART_FILE = re.compile(r"part-\d{5,}\.(jsonl|docs)(\.tmp)?")
+CHECKPOINT_TMP_FILE = CHECKPOINT_FILE + ".tmp"
+
+
+@dataclass
+class Checkpoint:
+    corpus: str
+    chunks: List[str] = field(default_factory=list)
+    documents: int = 0
+    fields: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "corpus": self.corpus,
+            "chunks": self.chunks,
+            "documents": self.documents,
+            "fields": self.fields,
+        }
+
+
+def _write_atomic(path: Path, text: str):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _docs_path(chunk_path: Path) -> Path:
+    return chunk_path.with_suffix(".docs")
+
+
+def load_checkpoint(output_dir: Path, corpus: Path) -> Checkpoint:
+    checkpoint_path = output_dir / CHECKPOINT_FILE
+    if not checkpoint_path.exists():
+        return Checkpoint(corpus=str(corpus))
+
+    with open(checkpoint_path) as f:
+        data = json.load(f)
+    if data["corpus"] != str(corpus):
+        raise ValueError(
+            f"{output_dir} holds a checkpoint for {data['corpus']}, not {corpus}; "
+            "use a different output directory or --restart"
+        )
+    return Checkpoint(**data)
+
+
+def discard_uncommitted(output_dir: Path, checkpoint: Checkpoint):
+    committed = set(checkpoint.chunks)
+    for path in output_dir.iterdir():
+        if path.name == CHECKPOINT_TMP_FILE:
+            path.unlink()
+            continue
+        match = PART_FILE.fullmatch(path.name)
+        if match is None:
+            continue
+        is_tmp = match.group(2) is not None
+        if is_tmp or path.with_suffix(".jsonl").name not in committed:
+            path.unlink()
+
+
+def remove_extraction_output(output_dir: Path) -> int:
+    """Delete the checkpoint and part files of a previous run; return the count."""
+    removed = 0
+    for path in output_dir.iterdir():
+        owned = path.name in (CHECKPOINT_FILE, CHECKPOINT_TMP_FILE)
+        if owned or PART_FILE.fullmatch(path.name):
+            path.unlink()
+            removed += 1
+    return removed
+
+
+def completed_documents(output_dir: Path, checkpoint: Checkpoint) -> Set[str]:
+    completed: Set[str] = set()
+    for chunk in checkpoint.chunks:
+        with open(_docs_path(output_dir / chunk)) as f:
+            completed.update(line.rstrip("\n") for line in f)
+    return completed
+
+
+class ProgressReporter:
+    def __init__(
+        self,
+        total: Optional[int],
+        already_done: int,
+        already_fields: int,
+        interval: float,
+    ):
+        self.total = total
+        self.already_done = already_done
+        self.already_fields = already_fields
+        self.interval = interval
+        self.start = time.perf_counter()
+        self.last_report = self.start
+
+    def maybe_report(self, documents: int, fields: int, force: bool = False):
+        now = time.perf_counter()
+        if not force and now - self.last_report < self.interval:
+            return
+        self.last_report = now
+
+        elapsed = now - self.start
+        docs_per_sec = (documents - self.already_done) / elapsed if elapsed else 0.0
+        fields_per_sec = (fields - self.already_fields) / elapsed if elapsed else 0.0
+        line = (
+            f"{documents} docs, {fields} fields, {docs_per_sec:.1f} docs/s, "
+            f"{fields_per_sec:.1f} fields/s"
+        )
+        if self.total:
+            remaining = max(self.total - documents, 0)
+            eta = remaining / docs_per_sec if docs_per_sec else float("inf")
+            line = f"[{documents / self.total:6.1%}] {line}, ETA {_format_eta(eta)}"
+        print(line, flush=True)
+
+
+def _format_eta(seconds: float) -> str:
+    if seconds == float("inf"):
+        return "unknown"
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{secs:02d}"
+
+
+def run_extraction(
+    corpus: Path,
+    output_dir: Path,
+    checkpoint_every: int = 1000,
+    parser: str = "html.parser",
+    report_interval: float = 10.0,
+    count_total: bool = True,
+) -> Checkpoint:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    checkpoint = load_checkpoint(output_dir, corpus)
+    discard_uncommitted(output_dir, checkpoint)
+    completed = completed_documents(output_dir, checkpoint)
+    if completed:
+        print(
+            f"Resuming from checkpoint: {len(completed)} documents in "
+            f"{len(checkpoint.chunks)} chunks"
+        )
+
+    total = count_documents(corpus) if count_total else None
+    progress = ProgressReporter(
+        total, checkpoint.documents, checkpoint.fields, report_interval
+    )
+
+    rows: List[str] = []
+    chunk_docs: List[str] = []
+    fields = checkpoint.fields
+
+    def commit():
+        chunk_name = f"part-{len(checkpoint.chunks):05d}.jsonl"
+        chunk_path = output_dir / chunk_name
+        _write_atomic(
+            _docs_path(chunk_path), "".join(f"{doc}\n" for doc in chunk_docs)
+        )
+        _write_atomic(chunk_path, "".join(rows))
+
+        checkpoint.chunks.append(chunk_name)
+        checkpoint.documents += len(chunk_docs)
+        checkpoint.fields = fields
+        _write_atomic(
+            output_dir / CHECKPOINT_FILE, json.dumps(checkpoint.to_dict(), indent=2)
+        )
+
+    for key, source, html in iter_documents(corpus, skip=completed):
+        for result in extract_features_from_html(html, parser):
+            row = {
+                "features": result["features"].to_vector().tolist(),
+                "source": source,
+                "element_id": result["element_id"],
+                "element_name": result["element_name"],
+                "input_type": result["input_type"],
+            }
+            rows.append(json.dumps(row) + "\n")
+            fields += 1
+        chunk_docs.append(key)
+
+        if len(chunk_docs) >= checkpoint_every:
+            commit()
+            rows, chunk_docs = [], []
+        progress.maybe_report(checkpoint.documents + len(chunk_docs), fields)
+
+    if chunk_docs:
+        commit()
+    progress.maybe_report(checkpoint.documents, fields, force=True)
+
+    return checkpoint
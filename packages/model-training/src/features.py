@@ -4,10 +4,18 @@ Mirrors the logic in the TypeScript field-scoring.ts file.
 """
 
 import re
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Any
-from bs4 import BeautifulSoup, Tag
-import numpy as np
+from dataclasses import astuple, dataclass, fields
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Sequence, Tuple
+
+# bs4 and numpy are imported where they are used so that dataset building,
+# augmentation and the CLI's --help don't pay their import cost up front.
+if TYPE_CHECKING:
+    import numpy as np
+    from bs4 import BeautifulSoup, Tag
+
+
+SCORE_CACHE_SIZE = 65536
 
 
 @dataclass
@@ -58,7 +66,9 @@ class FieldFeatures:
     has_aria_label: int = 0
     inputmode_numeric: int = 0
 
-    def to_vector(self) -> np.ndarray:
+    def to_vector(self) -> "np.ndarray":
+        import numpy as np
+
         return np.array(
             [
                 self.type_text,
@@ -110,6 +120,20 @@ class FieldFeatures:
             dtype=np.float32,
         )
 
+    def to_sparse_entries(self) -> List[Tuple[int, float]]:
+        return [
+            (index, float(value))
+            for index, value in enumerate(astuple(self))
+            if value
+        ]
+
+    @classmethod
+    def from_vector(cls, vector: Sequence[float]) -> "FieldFeatures":
+        values = {}
+        for field_info, value in zip(fields(cls), vector):
+            values[field_info.name] = field_info.type(value)
+        return cls(**values)
+
     @classmethod
     def feature_names(cls) -> List[str]:
         return [
@@ -192,6 +216,10 @@ class FeatureExtractor:
         re.compile(r"credential", re.I),
     ]
 
+    LOGIN_PATTERNS = [
+        re.compile(r"login", re.I),
+    ]
+
     TOTP_PATTERNS = [
         re.compile(r"totp", re.I),
         re.compile(r"otp", re.I),
@@ -207,7 +235,7 @@ class FeatureExtractor:
     ]
 
     def extract_from_element(
-        self, input_elem: Tag, soup: Optional[BeautifulSoup] = None
+        self, input_elem: "Tag", soup: Optional["BeautifulSoup"] = None
     ) -> FieldFeatures:
         features = FieldFeatures()
 
@@ -218,41 +246,37 @@ class FeatureExtractor:
         self._set_autocomplete(features, autocomplete)
 
         name = input_elem.get("name", "")
-        features.name_has_user = self._match_score(name, self.USERNAME_PATTERNS)
-        features.name_has_login = self._match_score(name, [re.compile(r"login", re.I)])
-        features.name_has_email = self._match_score(name, self.EMAIL_PATTERNS)
-        features.name_has_pass = self._match_score(name, self.PASSWORD_PATTERNS)
+        (
+            features.name_has_user,
+            features.name_has_login,
+            features.name_has_email,
+            features.name_has_pass,
+        ) = self._attribute_scores(name, "identifier")
         features.name_length = len(name) / 50.0
 
         elem_id = input_elem.get("id", "")
-        features.id_has_user = self._match_score(elem_id, self.USERNAME_PATTERNS)
-        features.id_has_login = self._match_score(elem_id, [re.compile(r"login", re.I)])
-        features.id_has_email = self._match_score(elem_id, self.EMAIL_PATTERNS)
-        features.id_has_pass = self._match_score(elem_id, self.PASSWORD_PATTERNS)
+        (
+            features.id_has_user,
+            features.id_has_login,
+            features.id_has_email,
+            features.id_has_pass,
+        ) = self._attribute_scores(elem_id, "identifier")
         features.id_length = len(elem_id) / 50.0
 
         placeholder = input_elem.get("placeholder", "")
-        features.placeholder_has_user = self._match_score(
-            placeholder, self.USERNAME_PATTERNS
-        )
-        features.placeholder_has_email = self._match_score(
-            placeholder, self.EMAIL_PATTERNS
-        )
-        features.placeholder_has_pass = self._match_score(
-            placeholder, self.PASSWORD_PATTERNS
-        )
+        (
+            features.placeholder_has_user,
+            features.placeholder_has_email,
+            features.placeholder_has_pass,
+        ) = self._attribute_scores(placeholder, "label")
         features.placeholder_length = len(placeholder) / 100.0
 
         aria_label = input_elem.get("aria-label", "")
-        features.aria_label_has_user = self._match_score(
-            aria_label, self.USERNAME_PATTERNS
-        )
-        features.aria_label_has_email = self._match_score(
-            aria_label, self.EMAIL_PATTERNS
-        )
-        features.aria_label_has_pass = self._match_score(
-            aria_label, self.PASSWORD_PATTERNS
-        )
+        (
+            features.aria_label_has_user,
+            features.aria_label_has_email,
+            features.aria_label_has_pass,
+        ) = self._attribute_scores(aria_label, "label")
         features.aria_label_length = len(aria_label) / 100.0
 
         self._extract_context_features(features, input_elem)
@@ -298,13 +322,12 @@ class FeatureExtractor:
         else:
             features.auto_other = 1
 
-    def _match_score(self, text: str, patterns: List[re.Pattern]) -> float:
+    def _attribute_scores(self, text: str, group: str) -> Tuple[float, ...]:
         if not text:
-            return 0.0
-        matches = sum(1 for p in patterns if p.search(text))
-        return min(matches / len(patterns) * 3, 1.0) if patterns else 0.0
+            return (0.0,) * len(PATTERN_GROUPS[group])
+        return _cached_attribute_scores(text, group)
 
-    def _extract_context_features(self, features: FieldFeatures, input_elem: Tag):
+    def _extract_context_features(self, features: FieldFeatures, input_elem: "Tag"):
         parent = input_elem.find_parent()
         if parent:
             parent_name = parent.name.lower() if parent.name else ""
@@ -334,8 +357,55 @@ class FeatureExtractor:
             )
 
 
-def extract_features_from_html(html: str) -> List[Dict[str, Any]]:
-    soup = BeautifulSoup(html, "html.parser")
+PATTERN_GROUPS: Dict[str, Tuple[List[re.Pattern], ...]] = {
+    "identifier": (
+        FeatureExtractor.USERNAME_PATTERNS,
+        FeatureExtractor.LOGIN_PATTERNS,
+        FeatureExtractor.EMAIL_PATTERNS,
+        FeatureExtractor.PASSWORD_PATTERNS,
+    ),
+    "label": (
+        FeatureExtractor.USERNAME_PATTERNS,
+        FeatureExtractor.EMAIL_PATTERNS,
+        FeatureExtractor.PASSWORD_PATTERNS,
+    ),
+}
+
+
+def _match_score(text: str, patterns: List[re.Pattern]) -> float:
+    if not text:
+        return 0.0
+    matches = sum(1 for p in patterns if p.search(text))
+    return min(matches / len(patterns) * 3, 1.0) if patterns else 0.0
+
+
+@lru_cache(maxsize=SCORE_CACHE_SIZE)
+def _cached_attribute_scores(text: str, group: str) -> Tuple[float, ...]:
+    return tuple(_match_score(text, patterns) for patterns in PATTERN_GROUPS[group])
+
+
+def score_cache_stats() -> Dict[str, Any]:
+    info = _cached_attribute_scores.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "maxsize": info.maxsize,
+        "hit_rate": info.hits / lookups if lookups else 0.0,
+    }
+
+
+def clear_score_cache():
+    _cached_attribute_scores.cache_clear()
+
+
+def extract_features_from_html(
+    html: str, parser: str = "html.parser"
+) -> List[Dict[str, Any]]:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, parser)
     extractor = FeatureExtractor()
 
     results = []
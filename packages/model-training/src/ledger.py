@@ -0,0 +1,271 @@
+"""Append-only ledger of pipeline runs with per-stage timing and memory."""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+STAGE_METRICS_ENV = "PEACH_STAGE_METRICS"
+DEFAULT_LEDGER_PATH = Path("runs") / "ledger.jsonl"
+REGRESSION_FIELDS = ["wall_s", "cpu_s", "peak_rss_mb", "tracemalloc_peak_mb"]
+# Absolute change below which a relative jump is treated as noise, so that a
+# millisecond stage going from 1ms to 2ms is not reported as a regression.
+MIN_REGRESSION_DELTA = {
+    "wall_s": 0.1,
+    "cpu_s": 0.1,
+    "peak_rss_mb": 5.0,
+    "tracemalloc_peak_mb": 5.0,
+}
+
+
+@dataclass
+class StageRecord:
+    name: str
+    wall_s: float = 0.0
+    cpu_s: Optional[float] = 0.0
+    peak_rss_mb: Optional[float] = None
+    tracemalloc_peak_mb: Optional[float] = None
+    metrics: Dict[str, Any] = field(default_factory=dict)
+
+
+def record_metric(name: str, value: Any):
+    """Report a metric (e.g. a sample count) to the pipeline stage running us.
+
+    A no-op when the script is run on its own rather than from pipeline.py.
+    """
+    path = os.environ.get(STAGE_METRICS_ENV)
+    if not path:
+        return
+    with open(path, "a") as f:
+        f.write(json.dumps({name: value}) + "\n")
+
+
+def _read_metrics(path: str) -> Dict[str, Any]:
+    metrics: Dict[str, Any] = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                metrics.update(json.loads(line))
+    return metrics
+
+
+def _maxrss_mb(maxrss: int) -> float:
+    # ru_maxrss is bytes on macOS and kilobytes everywhere else.
+    if sys.platform == "darwin":
+        return maxrss / (1024 * 1024)
+    return maxrss / 1024
+
+
+def run_subprocess_stage(
+    name: str, cmd: List[str], cwd: Optional[Path] = None
+) -> Tuple[subprocess.CompletedProcess, StageRecord]:
+    with tempfile.TemporaryDirectory() as tmp:
+        metrics_path = os.path.join(tmp, "metrics.jsonl")
+        open(metrics_path, "w").close()
+        env = dict(os.environ, **{STAGE_METRICS_ENV: metrics_path})
+
+        if not hasattr(os, "wait4"):
+            # No per-child rusage on this platform (Windows): time the stage
+            # and leave CPU and peak RSS unmeasured.
+            start = time.perf_counter()
+            result = subprocess.run(
+                cmd, cwd=cwd, capture_output=True, text=True, env=env
+            )
+            record = StageRecord(
+                name=name,
+                wall_s=time.perf_counter() - start,
+                cpu_s=None,
+                metrics=_read_metrics(metrics_path),
+            )
+            return result, record
+
+        with tempfile.TemporaryFile("w+") as out, tempfile.TemporaryFile("w+") as err:
+            start = time.perf_counter()
+            proc = subprocess.Popen(cmd, cwd=cwd, stdout=out, stderr=err, env=env)
+            # wait4 gives this child's own rusage; RUSAGE_CHILDREN would report
+            # the largest peak RSS of any stage run so far.
+            _, status, usage = os.wait4(proc.pid, 0)
+            wall_s = time.perf_counter() - start
+            proc.returncode = os.waitstatus_to_exitcode(status)
+
+            out.seek(0)
+            err.seek(0)
+            result = subprocess.CompletedProcess(
+                cmd, proc.returncode, out.read(), err.read()
+            )
+
+        record = StageRecord(
+            name=name,
+            wall_s=wall_s,
+            cpu_s=usage.ru_utime + usage.ru_stime,
+            peak_rss_mb=_maxrss_mb(usage.ru_maxrss),
+            metrics=_read_metrics(metrics_path),
+        )
+
+    return result, record
+
+
+@contextmanager
+def in_process_stage(name: str) -> Iterator[StageRecord]:
+    record = StageRecord(name=name)
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield record
+    finally:
+        record.wall_s = time.perf_counter() - wall_start
+        record.cpu_s = time.process_time() - cpu_start
+        record.tracemalloc_peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        if not was_tracing:
+            tracemalloc.stop()
+
+
+def new_run_id() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def append_run(path: Path, run_id: str, stages: List[StageRecord], status: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    entry = {
+        "run_id": run_id,
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "status": status,
+        "stages": [asdict(stage) for stage in stages],
+    }
+    with open(path, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def load_runs(path: Path) -> List[Dict[str, Any]]:
+    if not path.exists():
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def find_run(runs: List[Dict[str, Any]], run_id: str) -> Dict[str, Any]:
+    for run in runs:
+        if run["run_id"] == run_id:
+            return run
+    raise KeyError(f"Run {run_id} not found in ledger")
+
+
+def diff_runs(
+    base: Dict[str, Any], head: Dict[str, Any], threshold: float = 0.25
+) -> List[Dict[str, Any]]:
+    base_stages = {stage["name"]: stage for stage in base["stages"]}
+    rows = []
+
+    for stage in head["stages"]:
+        previous = base_stages.get(stage["name"])
+        if previous is None:
+            continue
+        for key in REGRESSION_FIELDS:
+            old, new = previous.get(key), stage.get(key)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else 0.0
+            rows.append(
+                {
+                    "stage": stage["name"],
+                    "field": key,
+                    "base": old,
+                    "head": new,
+                    "change": change,
+                    "regression": change > threshold
+                    and new - old > MIN_REGRESSION_DELTA[key],
+                }
+            )
+        for key in sorted(set(previous["metrics"]) | set(stage["metrics"])):
+            old, new = previous["metrics"].get(key), stage["metrics"].get(key)
+            if old != new:
+                rows.append(
+                    {
+                        "stage": stage["name"],
+                        "field": f"metrics.{key}",
+                        "base": old,
+                        "head": new,
+                        "change": None,
+                        "regression": False,
+                    }
+                )
+
+    return rows
+
+
+def print_diff(rows: List[Dict[str, Any]]):
+    print(f"{'stage':<16} {'field':<22} {'base':>12} {'head':>12} {'change':>9}")
+    for row in rows:
+        change = "" if row["change"] is None else f"{row['change']:+.1%}"
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['stage']:<16} {row['field']:<22} {_fmt(row['base']):>12} "
+            f"{_fmt(row['head']):>12} {change:>9}{flag}"
+        )
+
+
+def _fmt(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return str(value)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ledger", type=Path, default=DEFAULT_LEDGER_PATH)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="List recorded runs")
+
+    diff_parser = subparsers.add_parser("diff", help="Compare two runs")
+    diff_parser.add_argument("base", nargs="?", help="Defaults to the second-latest run")
+    diff_parser.add_argument("head", nargs="?", help="Defaults to the latest run")
+    diff_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Relative increase that counts as a regression (default 0.25)",
+    )
+
+    args = parser.parse_args(argv)
+    runs = load_runs(args.ledger)
+
+    if args.command == "list":
+        for run in runs:
+            total = sum(stage["wall_s"] for stage in run["stages"])
+            print(f"{run['run_id']}  {run['status']:<8} {total:8.2f}s")
+        return
+
+    if args.base:
+        base = find_run(runs, args.base)
+        head = find_run(runs, args.head) if args.head else runs[-1]
+    elif len(runs) >= 2:
+        base, head = runs[-2], runs[-1]
+    else:
+        print("Need at least two runs in the ledger to diff")
+        sys.exit(1)
+
+    print(f"Comparing {base['run_id']} -> {head['run_id']}\n")
+    rows = diff_runs(base, head, threshold=args.threshold)
+    print_diff(rows)
+
+    if any(row["regression"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Stream a crawled corpus through the model and keep the least certain fields.
+
+Pages are extracted one at a time, scored in fixed-size ONNX batches, and
+only the top-K most uncertain fields per predicted class are retained, so
+memory stays constant regardless of corpus size.
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+from corpus import iter_pages
+from features import extract_features_from_html
+from train import REVERSE_MAPPING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+UNCERTAINTY_METRICS = ("margin", "entropy")
+
+
+def uncertainty_scores(probabilities: "np.ndarray", metric: str) -> "np.ndarray":
+    """Higher means less certain: 1 - (p1 - p2) for margin, Shannon entropy otherwise."""
+    import numpy as np
+
+    if metric == "margin":
+        top_two = np.sort(probabilities, axis=1)[:, -2:]
+        return 1.0 - (top_two[:, 1] - top_two[:, 0])
+    if metric == "entropy":
+        clipped = np.clip(probabilities, 1e-12, 1.0)
+        return -(clipped * np.log(clipped)).sum(axis=1)
+    raise ValueError(f"Unknown uncertainty metric: {metric}")
+
+
+def iter_field_batches(
+    corpus: Path, batch_size: int
+) -> Iterator[Tuple["np.ndarray", List[Dict[str, str]]]]:
+    import numpy as np
+
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+
+    vectors: List[np.ndarray] = []
+    meta: List[Dict[str, str]] = []
+
+    for source, html in iter_pages(corpus):
+        for result in extract_features_from_html(html):
+            vectors.append(result["features"].to_vector())
+            meta.append(
+                {
+                    "source": source,
+                    "element_id": result["element_id"],
+                    "element_name": result["element_name"],
+                }
+            )
+            if len(vectors) == batch_size:
+                yield np.stack(vectors), meta
+                vectors, meta = [], []
+
+    if vectors:
+        yield np.stack(vectors), meta
+
+
+class UncertaintyHeap:
+    """Bounded min-heaps holding the top-K most uncertain fields per class."""
+
+    def __init__(self, top_k: int):
+        if top_k < 1:
+            raise ValueError(f"top_k must be at least 1, got {top_k}")
+        self.top_k = top_k
+        self.heaps: Dict[int, List[Tuple[float, int, Dict[str, Any]]]] = {}
+        self._counter = itertools.count()
+
+    def offer(self, score: float, predicted: int, record_factory):
+        heap = self.heaps.setdefault(predicted, [])
+        if len(heap) < self.top_k:
+            heapq.heappush(heap, (score, next(self._counter), record_factory()))
+        elif score > heap[0][0]:
+            heapq.heapreplace(heap, (score, next(self._counter), record_factory()))
+
+    def results(self) -> Iterator[Dict[str, Any]]:
+        for predicted in sorted(self.heaps):
+            for score, _, record in sorted(self.heaps[predicted], reverse=True):
+                yield record
+
+
+def mine_uncertain_fields(
+    corpus: Path,
+    model_path: str,
+    top_k: int = 100,
+    metric: str = "margin",
+    batch_size: int = 512,
+) -> Tuple[UncertaintyHeap, Dict[str, int]]:
+    import onnxruntime as ort
+
+    if metric not in UNCERTAINTY_METRICS:
+        raise ValueError(f"Unknown uncertainty metric: {metric}")
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+
+    session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+    input_name = session.get_inputs()[0].name
+    heap = UncertaintyHeap(top_k)
+    stats = {"fields": 0, "batches": 0}
+
+    for X, meta in iter_field_batches(corpus, batch_size):
+        _, probabilities = session.run(None, {input_name: X})
+        scores = uncertainty_scores(probabilities, metric)
+        predicted = probabilities.argmax(axis=1)
+
+        for i, row in enumerate(meta):
+            heap.offer(
+                float(scores[i]),
+                int(predicted[i]),
+                lambda i=i, row=row: {
+                    **row,
+                    "predicted": REVERSE_MAPPING[int(predicted[i])],
+                    "uncertainty": round(float(scores[i]), 6),
+                    "probabilities": [round(float(p), 4) for p in probabilities[i]],
+                },
+            )
+
+        stats["fields"] += len(meta)
+        stats["batches"] += 1
+
+    return heap, stats
+
+
+def write_review_file(heap: UncertaintyHeap, output_path: Path) -> int:
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with open(output_path, "w") as f:
+        for record in heap.results():
+            f.write(json.dumps(record) + "\n")
+            count += 1
+    return count
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("corpus", type=Path, help="HTML directory, HTML file or JSONL")
+    parser.add_argument("--model", default="models/form_detector.onnx")
+    parser.add_argument(
+        "--output", type=Path, default=Path("data/review/uncertain_fields.jsonl")
+    )
+    parser.add_argument("--top-k", type=int, default=100, help="Fields kept per class")
+    parser.add_argument("--metric", choices=UNCERTAINTY_METRICS, default="margin")
+    parser.add_argument("--batch-size", type=int, default=512)
+    args = parser.parse_args(argv)
+    if args.top_k < 1:
+        parser.error("--top-k must be at least 1")
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+
+    print(f"Mining {args.corpus} by {args.metric}...")
+    heap, stats = mine_uncertain_fields(
+        args.corpus,
+        args.model,
+        top_k=args.top_k,
+        metric=args.metric,
+        batch_size=args.batch_size,
+    )
+    written = write_review_file(heap, args.output)
+
+    print(f"Scored {stats['fields']} fields in {stats['batches']} batches")
+    print(f"Wrote {written} fields for review to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
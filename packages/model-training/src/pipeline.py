@@ -5,43 +5,99 @@ import sys
 import shutil
 from pathlib import Path
 
+from ledger import (
+    StageRecord,
+    append_run,
+    in_process_stage,
+    new_run_id,
+    run_subprocess_stage,
+)
 
-def run_command(cmd: list[str], cwd: Path | None = None):
+
+def run_command(
+    cmd: list[str], stages: list[StageRecord], name: str, cwd: Path | None = None
+) -> subprocess.CompletedProcess:
     print(f"Running: {' '.join(cmd)}")
-    result = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True)
+    result, record = run_subprocess_stage(name, cmd, cwd=cwd)
+    stages.append(record)
     if result.returncode != 0:
         print(f"Error: {result.stderr}")
-        sys.exit(1)
+        raise RuntimeError(f"Stage {name} failed")
     print(result.stdout)
+    print_stage(record)
     return result
 
 
+def print_stage(record: StageRecord):
+    if record.peak_rss_mb is not None:
+        memory = f"peak RSS {record.peak_rss_mb:.1f} MB"
+    elif record.tracemalloc_peak_mb is not None:
+        memory = f"tracemalloc peak {record.tracemalloc_peak_mb:.1f} MB"
+    else:
+        memory = "memory not measured"
+    cpu = f"{record.cpu_s:.2f}s" if record.cpu_s is not None else "n/a"
+    print(f"[{record.name}] wall {record.wall_s:.2f}s, cpu {cpu}, {memory}")
+    for key, value in record.metrics.items():
+        print(f"[{record.name}] {key}: {value}")
+
+
 def main():
     base_dir = Path(__file__).parent.parent
+    ledger_path = base_dir / "runs" / "ledger.jsonl"
+    run_id = new_run_id()
+    stages: list[StageRecord] = []
 
     print("=== Peach Form Detection Model Training Pipeline ===\n")
+    print(f"Run ID: {run_id}\n")
 
-    print("Step 1: Building dataset...")
-    run_command([sys.executable, "src/dataset.py"], cwd=base_dir)
+    try:
+        # Each stage is a separate CLI invocation so the ledger gets its own
+        # CPU time and peak RSS, and only imports what that stage needs.
+        print("Step 1: Building dataset...")
+        run_command([sys.executable, "src/cli.py", "build"], stages, "build", cwd=base_dir)
 
-    print("\nStep 2: Training model...")
-    run_command([sys.executable, "src/train.py"], cwd=base_dir)
+        print("\nStep 2: Augmenting dataset...")
+        run_command(
+            [sys.executable, "src/cli.py", "augment"], stages, "augment", cwd=base_dir
+        )
 
-    print("\nStep 3: Copying model to extension...")
-    model_source = base_dir / "models" / "form_detector.onnx"
-    model_dest = (
-        base_dir.parent / "extension" / "public" / "models" / "form_detector.onnx"
-    )
+        # Training and export share one process: both need xgboost, and the
+        # export reuses the in-memory test split instead of re-splitting.
+        print("\nStep 3: Training and exporting model...")
+        run_command(
+            [sys.executable, "src/cli.py", "train", "--export"],
+            stages,
+            "train",
+            cwd=base_dir,
+        )
 
-    if model_source.exists():
-        shutil.copy(model_source, model_dest)
+        print("\nStep 4: Copying model to extension...")
+        model_source = base_dir / "models" / "form_detector.onnx"
+        model_dest = (
+            base_dir.parent / "extension" / "public" / "models" / "form_detector.onnx"
+        )
+
+        if not model_source.exists():
+            print(f"Error: Model not found at {model_source}")
+            raise RuntimeError("Model artifact missing")
+
+        with in_process_stage("copy_model") as record:
+            shutil.copy(model_source, model_dest)
+            record.metrics["model_kb"] = round(model_dest.stat().st_size / 1024, 2)
+        stages.append(record)
         print(f"Model copied to {model_dest}")
-    else:
-        print(f"Error: Model not found at {model_source}")
+        print_stage(record)
+    except RuntimeError:
+        append_run(ledger_path, run_id, stages, status="failed")
+        print(f"Run {run_id} recorded in {ledger_path}")
         sys.exit(1)
 
+    append_run(ledger_path, run_id, stages, status="ok")
+
     print("\n=== Pipeline Complete ===")
     print(f"Model size: {model_dest.stat().st_size / 1024:.2f} KB")
+    print(f"Run {run_id} recorded in {ledger_path}")
+    print("Compare with the previous run: python src/ledger.py diff")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,325 @@
+"""Shrink the exported model: truncate to the best iteration and prune trees.
+
+``truncate_to_best_iteration`` drops boosting rounds after early stopping's
+best iteration, which ``XGBClassifier.predict`` already ignores but the ONNX
+converter would otherwise ship. ``prune_tree_ensemble`` then rewrites the
+ONNX ``TreeEnsembleClassifier`` in place:
+
+- a split whose two leaf children differ by at most ``leaf_tolerance`` is
+  collapsed into one leaf holding their mean (repeated bottom-up);
+- a tree reduced to a single leaf is folded exactly into ``base_values``;
+- a tree whose leaves are all within ``drop_tolerance`` of zero is dropped.
+
+Every change moves a class margin by at most the tolerance. Pruning tracks
+how far each leaf it touches moved, and ``PruneStats.probability_bound`` is
+the largest probability change the pruned model can show on any input, which
+export uses as the equivalence tolerance for the pruned artifact.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+
+NODE_ATTRIBUTES = [
+    "nodes_treeids",
+    "nodes_nodeids",
+    "nodes_featureids",
+    "nodes_modes",
+    "nodes_values",
+    "nodes_truenodeids",
+    "nodes_falsenodeids",
+    "nodes_missing_value_tracks_true",
+]
+CLASS_ATTRIBUTES = ["class_treeids", "class_nodeids", "class_ids", "class_weights"]
+
+
+@dataclass
+class PruneStats:
+    trees_before: int = 0
+    trees_after: int = 0
+    nodes_before: int = 0
+    nodes_after: int = 0
+    collapsed_splits: int = 0
+    folded_trees: int = 0
+    dropped_trees: int = 0
+    # Largest total leaf movement over the trees of any one class; a row
+    # reaches one leaf per tree, so no class margin moves further.
+    max_margin_shift: float = 0.0
+
+    @property
+    def probability_bound(self) -> float:
+        # A softmax probability moves by at most half the largest margin shift.
+        return self.max_margin_shift / 2
+
+
+def truncate_to_best_iteration(model):
+    import xgboost as xgb
+
+    booster = model.get_booster()
+    rounds = booster.num_boosted_rounds()
+    best = booster.attr("best_iteration")
+    if best is None or int(best) + 1 >= rounds:
+        return model, rounds, rounds
+
+    attributes = booster.attributes()
+    truncated_booster = booster[: int(best) + 1]
+    # Slicing drops booster attributes, including the zero_as_missing marker
+    # that export relies on for CSR-trained models.
+    truncated_booster.set_attr(**attributes)
+
+    truncated = xgb.XGBClassifier()
+    truncated.load_model(truncated_booster.save_raw("json"))
+    return truncated, rounds, int(best) + 1
+
+
+def compare_pruned_model(
+    unpruned_path: str, pruned_path: str, X, y
+) -> Dict[str, float]:
+    import os
+
+    import numpy as np
+    import onnxruntime as ort
+
+    from bench import benchmark_model_startup
+    from train import is_sparse
+
+    dense = X.toarray() if is_sparse(X) else np.asarray(X, dtype=np.float32)
+    probabilities = {}
+    for name, path in (("before", unpruned_path), ("after", pruned_path)):
+        session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+        input_name = session.get_inputs()[0].name
+        probabilities[name] = session.run(None, {input_name: dense})[1]
+
+    before, after = probabilities["before"], probabilities["after"]
+    latency_before = benchmark_model_startup(unpruned_path, runs=50)
+    latency_after = benchmark_model_startup(pruned_path, runs=50)
+    bytes_before = os.path.getsize(unpruned_path)
+    bytes_after = os.path.getsize(pruned_path)
+
+    return {
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "bytes_saved": bytes_before - bytes_after,
+        "latency_before_ms": latency_before["steady_inference_ms"],
+        "latency_after_ms": latency_after["steady_inference_ms"],
+        "create_before_ms": latency_before["create_ms"],
+        "create_after_ms": latency_after["create_ms"],
+        "accuracy_before": float((before.argmax(axis=1) == y).mean()),
+        "accuracy_after": float((after.argmax(axis=1) == y).mean()),
+        "argmax_changes": int((before.argmax(axis=1) != after.argmax(axis=1)).sum()),
+        "max_abs_error": float(np.abs(before - after).max()) if len(y) else 0.0,
+    }
+
+
+def print_prune_report(stats: PruneStats, comparison: Dict[str, float]):
+    print(
+        f"Trees: {stats.trees_before} -> {stats.trees_after} "
+        f"({stats.folded_trees} folded into base values, {stats.dropped_trees} dropped)"
+    )
+    print(
+        f"Nodes: {stats.nodes_before} -> {stats.nodes_after} "
+        f"({stats.collapsed_splits} splits collapsed)"
+    )
+    print(
+        f"Size: {comparison['bytes_before'] / 1024:.2f} KB -> "
+        f"{comparison['bytes_after'] / 1024:.2f} KB "
+        f"({comparison['bytes_saved'] / 1024:.2f} KB saved)"
+    )
+    print(
+        f"Per-field latency: {comparison['latency_before_ms']:.3f} ms -> "
+        f"{comparison['latency_after_ms']:.3f} ms; session creation "
+        f"{comparison['create_before_ms']:.3f} ms -> {comparison['create_after_ms']:.3f} ms"
+    )
+    print(
+        f"Test accuracy: {comparison['accuracy_before']:.4f} -> "
+        f"{comparison['accuracy_after']:.4f} ({comparison['argmax_changes']} predictions "
+        f"changed, max probability change {comparison['max_abs_error']:.2e})"
+    )
+
+
+def _tree_ensemble_node(onnx_model):
+    for node in onnx_model.graph.node:
+        if node.op_type == "TreeEnsembleClassifier":
+            return node
+    raise ValueError("No TreeEnsembleClassifier node in the ONNX graph")
+
+
+def _read_attributes(node) -> Dict[str, list]:
+    from onnx import helper
+
+    values = {
+        attribute.name: helper.get_attribute_value(attribute)
+        for attribute in node.attribute
+    }
+    supported = NODE_ATTRIBUTES + CLASS_ATTRIBUTES
+    unsupported = [
+        name
+        for name in values
+        if name.startswith(("nodes_", "class_")) and name not in supported
+    ]
+    if unsupported:
+        raise ValueError(f"Cannot prune tree ensemble with {', '.join(unsupported)}")
+    return values
+
+
+def prune_tree_ensemble(
+    onnx_model, leaf_tolerance: float = 1e-3, drop_tolerance: float = 1e-3
+) -> PruneStats:
+    from onnx import helper
+
+    node = _tree_ensemble_node(onnx_model)
+    values = _read_attributes(node)
+    stats = PruneStats(nodes_before=len(values["nodes_treeids"]))
+
+    trees: Dict[int, Dict[int, dict]] = {}
+    for i, tree_id in enumerate(values["nodes_treeids"]):
+        trees.setdefault(tree_id, {})[values["nodes_nodeids"][i]] = {
+            "feature": values["nodes_featureids"][i],
+            "mode": values["nodes_modes"][i],
+            "value": values["nodes_values"][i],
+            "true": values["nodes_truenodeids"][i],
+            "false": values["nodes_falsenodeids"][i],
+            "missing": values["nodes_missing_value_tracks_true"][i],
+        }
+    leaves: Dict[Tuple[int, int], List[Tuple[int, float]]] = {}
+    for tree_id, node_id, class_id, weight in zip(
+        *(values[name] for name in CLASS_ATTRIBUTES)
+    ):
+        leaves.setdefault((tree_id, node_id), []).append((class_id, weight))
+    stats.trees_before = len(trees)
+
+    base_values = list(
+        values.get("base_values") or [0.0] * len(values["classlabels_int64s"])
+    )
+    kept: Dict[int, Dict[int, dict]] = {}
+    # How far each collapsed leaf's weight is from any leaf it replaced.
+    shifts: Dict[Tuple[int, int], float] = {}
+    margin_shifts: Dict[int, float] = {}
+
+    for tree_id in sorted(trees):
+        nodes = trees[tree_id]
+        stats.collapsed_splits += _collapse_similar_leaves(
+            tree_id, nodes, leaves, shifts, leaf_tolerance
+        )
+
+        leaf_ids = [node_id for node_id, n in nodes.items() if n["mode"] == b"LEAF"]
+        tree_leaves = [leaves[(tree_id, node_id)] for node_id in leaf_ids]
+        dropped = False
+        if len(nodes) == 1 and len(tree_leaves[0]) == 1:
+            class_id, weight = tree_leaves[0][0]
+            base_values[class_id] += weight
+            stats.folded_trees += 1
+        elif all(
+            abs(weight) <= drop_tolerance
+            for entries in tree_leaves
+            for _, weight in entries
+        ):
+            stats.dropped_trees += 1
+            dropped = True
+        else:
+            kept[tree_id] = nodes
+
+        tree_shifts: Dict[int, float] = {}
+        for node_id, entries in zip(leaf_ids, tree_leaves):
+            for class_id, weight in entries:
+                shift = shifts.get((tree_id, node_id), 0.0)
+                if dropped:
+                    shift += abs(weight)
+                tree_shifts[class_id] = max(tree_shifts.get(class_id, 0.0), shift)
+        for class_id, shift in tree_shifts.items():
+            margin_shifts[class_id] = margin_shifts.get(class_id, 0.0) + shift
+
+    rebuilt = {name: [] for name in NODE_ATTRIBUTES + CLASS_ATTRIBUTES}
+    for new_tree_id, tree_id in enumerate(sorted(kept)):
+        nodes = kept[tree_id]
+        renumber = {old: new for new, old in enumerate(_preorder(nodes))}
+        for old_id in sorted(nodes, key=renumber.get):
+            n = nodes[old_id]
+            is_leaf = n["mode"] == b"LEAF"
+            rebuilt["nodes_treeids"].append(new_tree_id)
+            rebuilt["nodes_nodeids"].append(renumber[old_id])
+            rebuilt["nodes_featureids"].append(n["feature"])
+            rebuilt["nodes_modes"].append(n["mode"])
+            rebuilt["nodes_values"].append(n["value"])
+            rebuilt["nodes_truenodeids"].append(0 if is_leaf else renumber[n["true"]])
+            rebuilt["nodes_falsenodeids"].append(0 if is_leaf else renumber[n["false"]])
+            rebuilt["nodes_missing_value_tracks_true"].append(n["missing"])
+            if is_leaf:
+                for class_id, weight in leaves[(tree_id, old_id)]:
+                    rebuilt["class_treeids"].append(new_tree_id)
+                    rebuilt["class_nodeids"].append(renumber[old_id])
+                    rebuilt["class_ids"].append(class_id)
+                    rebuilt["class_weights"].append(weight)
+
+    rebuilt["base_values"] = base_values
+    for attribute in list(node.attribute):
+        if attribute.name in rebuilt:
+            node.attribute.remove(attribute)
+    for name, value in rebuilt.items():
+        node.attribute.append(helper.make_attribute(name, value))
+
+    stats.trees_after = len(kept)
+    stats.nodes_after = len(rebuilt["nodes_treeids"])
+    stats.max_margin_shift = max(margin_shifts.values(), default=0.0)
+    return stats
+
+
+def _collapse_similar_leaves(
+    tree_id: int,
+    nodes: Dict[int, dict],
+    leaves: Dict[Tuple[int, int], List[Tuple[int, float]]],
+    shifts: Dict[Tuple[int, int], float],
+    tolerance: float,
+) -> int:
+    collapsed = 0
+    changed = True
+    while changed:
+        changed = False
+        for node_id, n in list(nodes.items()):
+            if n["mode"] == b"LEAF" or node_id not in nodes:
+                continue
+            left, right = nodes.get(n["true"]), nodes.get(n["false"])
+            if not (left and right):
+                continue
+            if left["mode"] != b"LEAF" or right["mode"] != b"LEAF":
+                continue
+            left_entries = leaves[(tree_id, n["true"])]
+            right_entries = leaves[(tree_id, n["false"])]
+            if len(left_entries) != 1 or len(right_entries) != 1:
+                continue
+            (left_class, left_weight), (right_class, right_weight) = (
+                left_entries[0],
+                right_entries[0],
+            )
+            if left_class != right_class or abs(left_weight - right_weight) > tolerance:
+                continue
+
+            leaves[(tree_id, node_id)] = [(left_class, (left_weight + right_weight) / 2)]
+            shifts[(tree_id, node_id)] = abs(left_weight - right_weight) / 2 + max(
+                shifts.pop((tree_id, n["true"]), 0.0),
+                shifts.pop((tree_id, n["false"]), 0.0),
+            )
+            del leaves[(tree_id, n["true"])], leaves[(tree_id, n["false"])]
+            del nodes[n["true"]], nodes[n["false"]]
+            n.update(mode=b"LEAF", feature=0, value=0.0, true=0, false=0, missing=0)
+            collapsed += 1
+            changed = True
+    return collapsed
+
+
+def _preorder(nodes: Dict[int, dict]) -> List[int]:
+    children = {
+        child
+        for n in nodes.values()
+        if n["mode"] != b"LEAF"
+        for child in (n["true"], n["false"])
+    }
+    root = next(node_id for node_id in nodes if node_id not in children)
+    order, stack = [], [root]
+    while stack:
+        node_id = stack.pop()
+        order.append(node_id)
+        n = nodes[node_id]
+        if n["mode"] != b"LEAF":
+            stack.extend([n["false"], n["true"]])
+    return order
@@ -0,0 +1,257 @@
+"""Time-budgeted quick training for fast feedback on feature changes.
+
+Trains on a stratified subsample (by label and source family) with the
+histogram tree method, early stopping and a wall-clock budget, then reports
+test accuracy with Wilson confidence intervals and exactly how much data
+and time the run used.
+"""
+
+import importlib
+import math
+import random
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from train import REVERSE_MAPPING, load_dataset, split_dataset
+
+
+# Per-row suffixes that would otherwise make every synthetic page or
+# augmented copy its own stratum.
+_SOURCE_SUFFIXES = re.compile(r"(_augmented|_\d+)+$")
+
+MIN_PER_LABEL = 20
+
+# Fewest rows per label that still leave two of each in the validation/test
+# half of the 70/15/15 stratified split; --max-rows may not go below this.
+MIN_CAPPED_PER_LABEL = 10
+
+
+@dataclass
+class QuickReport:
+    total_rows: int = 0
+    used_rows: int = 0
+    strata: int = 0
+    train_rows: int = 0
+    val_rows: int = 0
+    test_rows: int = 0
+    label_counts: Dict[str, int] = field(default_factory=dict)
+    rounds: int = 0
+    best_iteration: Optional[int] = None
+    stopped_by: str = "max_rounds"
+    accuracy: float = 0.0
+    accuracy_ci: Tuple[float, float] = (0.0, 0.0)
+    per_label: Dict[str, Tuple[float, float, float, int]] = field(default_factory=dict)
+    startup_s: float = 0.0
+    load_s: float = 0.0
+    train_s: float = 0.0
+    total_s: float = 0.0
+    budget_s: float = 0.0
+
+
+def source_group(source: str) -> str:
+    return _SOURCE_SUFFIXES.sub("", source)
+
+
+def wilson_interval(successes: int, trials: int, z: float = 1.96) -> Tuple[float, float]:
+    if trials == 0:
+        return 0.0, 0.0
+    p = successes / trials
+    denominator = 1 + z**2 / trials
+    centre = (p + z**2 / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z**2 / (4 * trials**2)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def stratified_subsample(
+    labels: Sequence[int],
+    sources: Sequence[str],
+    fraction: float,
+    seed: int = 42,
+    max_rows: Optional[int] = None,
+) -> Tuple[List[int], int]:
+    """Pick ``fraction`` of every (label, source family) stratum.
+
+    Every stratum keeps at least one row and every label at least
+    MIN_PER_LABEL (or all of its rows), so rare classes survive the cut and
+    the later stratified split stays possible. ``max_rows`` is a hard cap:
+    when those minimums overshoot it, each label keeps up to an equal share
+    of the cap and the rest is taken evenly across strata.
+    """
+    rng = random.Random(seed)
+    strata: Dict[Tuple[int, str], List[int]] = defaultdict(list)
+    for row, (label, source) in enumerate(zip(labels, sources)):
+        strata[(int(label), source_group(source))].append(row)
+
+    # (priority, row) per label; lower priorities are kept first when the
+    # cap bites, interleaving strata in proportion to their share.
+    picks: Dict[int, List[Tuple[float, int]]] = defaultdict(list)
+    leftovers: Dict[int, List[int]] = defaultdict(list)
+    for (label, _), rows in sorted(strata.items()):
+        rng.shuffle(rows)
+        take = max(1, round(len(rows) * fraction))
+        picks[label].extend(
+            ((i + 0.5) / take, row) for i, row in enumerate(rows[:take])
+        )
+        leftovers[label].extend(rows[take:])
+
+    for label, rows in leftovers.items():
+        shortfall = MIN_PER_LABEL - len(picks[label])
+        if shortfall > 0:
+            picks[label].extend(
+                (1.0 + i, row) for i, row in enumerate(rows[:shortfall])
+            )
+
+    selected = [row for label_picks in picks.values() for _, row in label_picks]
+    if max_rows is not None and len(selected) > max_rows:
+        floor = min(MIN_PER_LABEL, max_rows // max(len(picks), 1))
+        selected, rest = [], []
+        for label_picks in picks.values():
+            label_picks.sort()
+            selected.extend(row for _, row in label_picks[:floor])
+            rest.extend(label_picks[floor:])
+        rest.sort()
+        selected.extend(row for _, row in rest[: max_rows - len(selected)])
+
+    selected.sort()
+    return selected, len(strata)
+
+
+def _budget_callback(budget_s: float, state: Dict[str, object]):
+    import xgboost as xgb
+
+    class WallClockBudget(xgb.callback.TrainingCallback):
+        def before_training(self, model):
+            state["start"] = time.perf_counter()
+            return model
+
+        def after_iteration(self, model, epoch, evals_log):
+            state["rounds"] = epoch + 1
+            if time.perf_counter() - state["start"] > budget_s:
+                state["stopped_by"] = "time_budget"
+                return True
+            return False
+
+    return WallClockBudget()
+
+
+def quick_train(
+    data_path: str,
+    fraction: float = 0.2,
+    max_rows: Optional[int] = None,
+    budget_s: float = 30.0,
+    max_rounds: int = 500,
+    seed: int = 42,
+    started: Optional[float] = None,
+) -> QuickReport:
+    """Run a quick training pass and report what it used.
+
+    Times count from ``started`` (a perf_counter() value) when given, so the
+    caller's own start-up is included in the total.
+    """
+    run_start = time.perf_counter() if started is None else started
+
+    min_rows = MIN_CAPPED_PER_LABEL * len(REVERSE_MAPPING)
+    if max_rows is not None and max_rows < min_rows:
+        raise ValueError(f"max_rows must be at least {min_rows} for a stratified split")
+
+    import numpy as np
+    import xgboost as xgb
+
+    # split_dataset imports sklearn lazily; load it now so start-up covers it.
+    importlib.import_module("sklearn.model_selection")
+
+    report = QuickReport(budget_s=budget_s)
+    report.startup_s = time.perf_counter() - run_start
+
+    load_start = time.perf_counter()
+    X, y, sources = load_dataset(data_path, with_sources=True)
+    report.total_rows = len(y)
+    report.load_s = time.perf_counter() - load_start
+
+    if max_rows:
+        fraction = min(fraction, max_rows / max(len(y), 1))
+    rows, report.strata = stratified_subsample(y, sources, fraction, seed, max_rows)
+    X, y = X[rows], y[rows]
+    report.used_rows = len(rows)
+    for label in y:
+        name = REVERSE_MAPPING[int(label)]
+        report.label_counts[name] = report.label_counts.get(name, 0) + 1
+
+    X_train, X_val, X_test, y_train, y_val, y_test = split_dataset(X, y)
+    report.train_rows, report.val_rows, report.test_rows = (
+        len(y_train),
+        len(y_val),
+        len(y_test),
+    )
+
+    state: Dict[str, object] = {"rounds": 0, "stopped_by": "max_rounds"}
+    model = xgb.XGBClassifier(
+        n_estimators=max_rounds,
+        max_depth=6,
+        learning_rate=0.1,
+        subsample=0.8,
+        colsample_bytree=0.8,
+        objective="multi:softprob",
+        num_class=5,
+        eval_metric="mlogloss",
+        tree_method="hist",
+        early_stopping_rounds=10,
+        random_state=seed,
+        callbacks=[_budget_callback(budget_s, state)],
+    )
+    train_start = time.perf_counter()
+    model.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
+    report.train_s = time.perf_counter() - train_start
+
+    report.rounds = int(state["rounds"])
+    report.best_iteration = getattr(model, "best_iteration", None)
+    if state["stopped_by"] == "time_budget":
+        report.stopped_by = "time_budget"
+    elif report.rounds < max_rounds:
+        report.stopped_by = "early_stopping"
+
+    predictions = model.predict(X_test)
+    correct = predictions == y_test
+    report.accuracy = float(correct.mean()) if len(y_test) else 0.0
+    report.accuracy_ci = wilson_interval(int(correct.sum()), len(y_test))
+    for label, name in REVERSE_MAPPING.items():
+        mask = y_test == label
+        trials = int(mask.sum())
+        if not trials:
+            continue
+        hits = int(np.sum(correct[mask]))
+        low, high = wilson_interval(hits, trials)
+        report.per_label[name] = (hits / trials, low, high, trials)
+
+    report.total_s = time.perf_counter() - run_start
+    return report
+
+
+def print_quick_report(report: QuickReport):
+    used = report.used_rows / max(report.total_rows, 1)
+    print(
+        f"Data: {report.used_rows} of {report.total_rows} rows ({used:.1%}) "
+        f"from {report.strata} label/source strata"
+    )
+    print(
+        f"Split: train {report.train_rows}, val {report.val_rows}, "
+        f"test {report.test_rows}"
+    )
+    print(f"Labels: {report.label_counts}")
+    print(
+        f"Training: {report.rounds} rounds, best iteration {report.best_iteration}, "
+        f"stopped by {report.stopped_by}"
+    )
+    print(
+        f"Time: start-up and imports {report.startup_s:.2f}s, load {report.load_s:.2f}s, "
+        f"train {report.train_s:.2f}s (budget {report.budget_s:g}s), "
+        f"total {report.total_s:.2f}s"
+    )
+
+    low, high = report.accuracy_ci
+    print(f"\nTest accuracy: {report.accuracy:.4f} (95% CI {low:.4f}-{high:.4f})")
+    for name, (recall, low, high, trials) in report.per_label.items():
+        print(f"  {name:<10} {recall:.4f} (95% CI {low:.4f}-{high:.4f}, n={trials})")
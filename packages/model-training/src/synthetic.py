@@ -0,0 +1,294 @@
+"""Lazy, template-driven synthetic HTML pages with ground-truth field labels.
+
+Unlike ``augment_dataset``, which perturbs already-extracted feature
+vectors, these pages go through ``extract_features_from_html`` like real
+markup. Each page varies attribute names, label text, placeholders,
+autocomplete hints, wrapper elements and nesting depth. Pages and samples
+are generated one at a time from a seeded RNG, so any number of them can be
+streamed with bounded memory and regenerated exactly from the seed.
+"""
+
+import html as html_lib
+import itertools
+import random
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from dataset import TrainingSample
+from features import extract_features_from_html
+
+
+PAGE_KINDS = ["login", "signup", "2fa", "negative"]
+PAGE_KIND_WEIGHTS = [0.4, 0.2, 0.15, 0.25]
+
+WRAPPER_TAGS = ["div", "div", "section", "fieldset", "span"]
+PAGE_WRAPPER_TAGS = ["div", "section", "main", "article"]
+WRAPPER_CLASSES = ["form-group", "field", "input-wrapper", "row", "col", "control"]
+
+USERNAME_NAMES = [
+    "username", "login", "user", "user_login", "userid", "user[login]",
+    "account", "session_key", "uname", "member_id", "handle", "loginName",
+]
+EMAIL_NAMES = [
+    "email", "email_address", "user_email", "login_email", "mail",
+    "emailAddress", "user[email]", "identifier",
+]
+PASSWORD_NAMES = [
+    "password", "passwd", "pass", "pwd", "user_password", "login_password",
+    "session_password", "user[password]", "Passwd", "secret",
+]
+NEW_PASSWORD_NAMES = [
+    "new_password", "password", "password1", "user[password]", "pass",
+]
+CONFIRM_PASSWORD_NAMES = [
+    "confirm_password", "password2", "password_confirmation", "repeat_password",
+]
+TOTP_NAMES = [
+    "otp", "totp", "code", "totpPin", "verification_code", "2fa_code",
+    "mfa_code", "token", "one_time_code", "auth_code",
+]
+
+USERNAME_TEXT = ["Username", "Username or email", "User ID", "Login", "Account name"]
+EMAIL_TEXT = ["Email", "Email address", "Work email", "E-mail", "Your email"]
+PASSWORD_TEXT = ["Password", "Your password", "Enter password", "Passphrase"]
+NEW_PASSWORD_TEXT = ["Create password", "New password", "Choose a password"]
+CONFIRM_TEXT = ["Confirm password", "Repeat password", "Re-enter password"]
+TOTP_TEXT = ["6-digit code", "Authentication code", "Verification code", "Enter code"]
+
+LOGIN_ACTIONS = ["/login", "/session", "/signin", "/auth/login", "/users/sign_in", ""]
+SIGNUP_ACTIONS = ["/signup", "/register", "/join", "/users", ""]
+TOTP_ACTIONS = ["/2fa", "/mfa/verify", "/session/otp", "/auth/challenge", ""]
+SUBMIT_TEXT = ["Sign in", "Log in", "Continue", "Next", "Submit", "Verify", "Create account"]
+
+# (name, label text, input type) for fields that must be labeled "none".
+NEGATIVE_FIELDS = [
+    ("q", "Search", "search"),
+    ("query", "Search...", "text"),
+    ("first_name", "First name", "text"),
+    ("last_name", "Last name", "text"),
+    ("full_name", "Full name", "text"),
+    ("street", "Street address", "text"),
+    ("city", "City", "text"),
+    ("zip", "ZIP code", "text"),
+    ("phone", "Phone number", "tel"),
+    ("card_number", "Card number", "text"),
+    ("expiry", "MM/YY", "text"),
+    ("cvv", "CVV", "text"),
+    ("company", "Company", "text"),
+    ("website", "Website", "url"),
+    ("quantity", "Quantity", "number"),
+    ("newsletter_email", "Subscribe to newsletter", "email"),
+    ("coupon", "Promo code", "text"),
+]
+
+
+@dataclass
+class FieldSpec:
+    name: str
+    label: str
+    input_type: str
+    text: str
+    autocomplete: Optional[str] = None
+    inputmode: Optional[str] = None
+    required: bool = False
+
+
+@dataclass
+class SyntheticPage:
+    kind: str
+    source: str
+    html: str
+    labels: Dict[str, str]
+
+
+class PageGenerator:
+    def __init__(self, seed: int = 0):
+        self.rng = random.Random(seed)
+
+    def _maybe(self, probability: float) -> bool:
+        return self.rng.random() < probability
+
+    def _autocomplete(self, hint: str) -> Optional[str]:
+        roll = self.rng.random()
+        if roll < 0.6:
+            return hint
+        if roll < 0.75:
+            return "off"
+        return None
+
+    def _username_field(self) -> FieldSpec:
+        return FieldSpec(
+            name=self.rng.choice(USERNAME_NAMES),
+            label="username",
+            input_type=self.rng.choice(["text", "text", "text", "email"]),
+            text=self.rng.choice(USERNAME_TEXT),
+            autocomplete=self._autocomplete("username"),
+            required=self._maybe(0.5),
+        )
+
+    def _email_field(self, label: str = "email") -> FieldSpec:
+        return FieldSpec(
+            name=self.rng.choice(EMAIL_NAMES),
+            label=label,
+            input_type=self.rng.choice(["email", "email", "text"]),
+            text=self.rng.choice(EMAIL_TEXT),
+            autocomplete=self._autocomplete(self.rng.choice(["email", "username"])),
+            required=self._maybe(0.5),
+        )
+
+    def _password_field(self, names: List[str], texts: List[str], hint: str) -> FieldSpec:
+        return FieldSpec(
+            name=self.rng.choice(names),
+            label="password",
+            input_type="password",
+            text=self.rng.choice(texts),
+            autocomplete=self._autocomplete(hint),
+            required=self._maybe(0.6),
+        )
+
+    def _totp_field(self) -> FieldSpec:
+        return FieldSpec(
+            name=self.rng.choice(TOTP_NAMES),
+            label="totp",
+            input_type=self.rng.choice(["tel", "text", "number"]),
+            text=self.rng.choice(TOTP_TEXT),
+            autocomplete=self._autocomplete("one-time-code"),
+            inputmode="numeric" if self._maybe(0.6) else None,
+            required=self._maybe(0.5),
+        )
+
+    def _negative_field(self) -> FieldSpec:
+        name, text, input_type = self.rng.choice(NEGATIVE_FIELDS)
+        return FieldSpec(
+            name=name,
+            label="none",
+            input_type=input_type,
+            text=text,
+            autocomplete="off" if self._maybe(0.3) else None,
+        )
+
+    def _fields_for(self, kind: str) -> Tuple[List[FieldSpec], str]:
+        if kind == "login":
+            identity = self._username_field() if self._maybe(0.5) else self._email_field()
+            fields = [identity]
+            # Identifier-first flows show the password on a second page.
+            if self._maybe(0.8):
+                fields.append(
+                    self._password_field(PASSWORD_NAMES, PASSWORD_TEXT, "current-password")
+                )
+            return fields, self.rng.choice(LOGIN_ACTIONS)
+
+        if kind == "signup":
+            fields = [self._negative_field() for _ in range(self.rng.randint(0, 2))]
+            fields.append(self._email_field())
+            if self._maybe(0.5):
+                fields.append(self._username_field())
+            fields.append(
+                self._password_field(NEW_PASSWORD_NAMES, NEW_PASSWORD_TEXT, "new-password")
+            )
+            if self._maybe(0.6):
+                fields.append(
+                    self._password_field(CONFIRM_PASSWORD_NAMES, CONFIRM_TEXT, "new-password")
+                )
+            return fields, self.rng.choice(SIGNUP_ACTIONS)
+
+        if kind == "2fa":
+            return [self._totp_field()], self.rng.choice(TOTP_ACTIONS)
+
+        fields = [self._negative_field() for _ in range(self.rng.randint(1, 4))]
+        return fields, self.rng.choice(["/search", "/subscribe", "/contact", "/checkout", ""])
+
+    def _render_input(self, field: FieldSpec, index: int) -> str:
+        attrs = [f'type="{field.input_type}"', f'name="{html_lib.escape(field.name)}"']
+        field_id = None
+        if self._maybe(0.7):
+            field_id = f"{field.name.replace('[', '_').replace(']', '')}_{index}"
+            attrs.append(f'id="{html_lib.escape(field_id)}"')
+        if self._maybe(0.6):
+            attrs.append(f'placeholder="{html_lib.escape(field.text)}"')
+        if self._maybe(0.3):
+            attrs.append(f'aria-label="{html_lib.escape(field.text)}"')
+        if field.autocomplete:
+            attrs.append(f'autocomplete="{field.autocomplete}"')
+        if field.inputmode:
+            attrs.append(f'inputmode="{field.inputmode}"')
+        if field.required:
+            attrs.append("required")
+
+        markup = f"<input {' '.join(attrs)} />"
+        if self._maybe(0.6):
+            target = f' for="{html_lib.escape(field_id)}"' if field_id else ""
+            markup = f"<label{target}>{html_lib.escape(field.text)}</label>{markup}"
+
+        return self._wrap(markup, self.rng.randint(0, 3), WRAPPER_TAGS)
+
+    def _wrap(self, markup: str, depth: int, tags: List[str]) -> str:
+        for _ in range(depth):
+            tag = self.rng.choice(tags)
+            css_class = self.rng.choice(WRAPPER_CLASSES)
+            markup = f'<{tag} class="{css_class}">{markup}</{tag}>'
+        return markup
+
+    def _render_submit(self) -> str:
+        text = self.rng.choice(SUBMIT_TEXT)
+        if self._maybe(0.7):
+            return f'<button type="submit">{text}</button>'
+        return f'<input type="submit" value="{text}" />'
+
+    def page(self, index: int) -> SyntheticPage:
+        kind = self.rng.choices(PAGE_KINDS, weights=PAGE_KIND_WEIGHTS)[0]
+        fields, action = self._fields_for(kind)
+
+        # Labels are keyed by element name, as in TEST_SITES, so names within a
+        # page must be unique; the first field with a given name wins.
+        labels: Dict[str, str] = {}
+        rendered = []
+        for field_index, field in enumerate(fields):
+            if field.name in labels:
+                continue
+            labels[field.name] = field.label
+            rendered.append(self._render_input(field, field_index))
+
+        if self._maybe(0.3):
+            rendered.append('<input type="hidden" name="csrf_token" value="x" />')
+        if self._maybe(0.2):
+            rendered.append('<input type="checkbox" name="remember_me" />')
+            labels["remember_me"] = "none"
+
+        action_attr = f' action="{action}"' if action else ""
+        form = (
+            f'<form{action_attr} method="post">{"".join(rendered)}'
+            f"{self._render_submit()}</form>"
+        )
+        body = self._wrap(form, self.rng.randint(0, 4), PAGE_WRAPPER_TAGS)
+
+        return SyntheticPage(
+            kind=kind,
+            source=f"synthetic_{kind}_{index}",
+            html=f"<html><body>{body}</body></html>",
+            labels=labels,
+        )
+
+
+def iter_synthetic_pages(
+    count: Optional[int] = None, seed: int = 0
+) -> Iterator[SyntheticPage]:
+    generator = PageGenerator(seed)
+    indices = range(count) if count is not None else itertools.count()
+    for index in indices:
+        yield generator.page(index)
+
+
+def iter_synthetic_samples(
+    pages: Iterator[SyntheticPage], parser: str = "html.parser"
+) -> Iterator[TrainingSample]:
+    for page in pages:
+        for result in extract_features_from_html(page.html, parser):
+            element_name = result["element_name"]
+            yield TrainingSample(
+                features=result["features"],
+                label=page.labels.get(element_name, "none"),
+                source=page.source,
+                element_id=result["element_id"],
+                element_name=element_name,
+            )
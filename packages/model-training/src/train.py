@@ -1,15 +1,10 @@
 """XGBoost training pipeline with ONNX export."""
 
 import json
-import numpy as np
-import xgboost as xgb
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, accuracy_score
-from onnxmltools.convert.common.data_types import FloatTensorType
-from onnxmltools.convert import convert_xgboost
-import onnx
-import onnxruntime as ort
+import copy
+import sys
 from features import FieldFeatures
+from ledger import record_metric
 
 
 LABEL_MAPPING = {
@@ -22,24 +17,85 @@ LABEL_MAPPING = {
 
 REVERSE_MAPPING = {v: k for k, v in LABEL_MAPPING.items()}
 
+NUM_FEATURES = len(FieldFeatures.feature_names())
 
-def load_dataset(path: str):
-    with open(path, "r") as f:
-        data = json.load(f)
+# numpy, xgboost, sklearn, onnx and onnxruntime are imported inside the
+# functions that use them: importing this module for LABEL_MAPPING (or running
+# a lightweight CLI command) must not pay seconds of ML-library start-up.
+
+
+# Set on boosters trained from CSR input. XGBoost treats entries absent from a
+# sparse matrix as missing rather than zero, so such a model only agrees with
+# dense inference if zeros are mapped to missing first.
+ZERO_AS_MISSING_ATTR = "zero_as_missing"
+
+
+def load_dataset(path: str, with_sources: bool = False):
+    import numpy as np
+
+    if path.endswith(".npz"):
+        return load_sparse_dataset(path, with_sources)
 
     X = []
     y = []
+    sources = []
 
-    for item in data:
-        features = np.array(item["features"], dtype=np.float32)
-        label = LABEL_MAPPING.get(item["label"], 4)
-        X.append(features)
-        y.append(label)
-
+    with open(path, "r") as f:
+        if path.endswith(".jsonl"):
+            data = (json.loads(line) for line in f if line.strip())
+        else:
+            data = json.load(f)
+
+        for item in data:
+            features = np.array(item["features"], dtype=np.float32)
+            label = LABEL_MAPPING.get(item["label"], 4)
+            X.append(features)
+            y.append(label)
+            if with_sources:
+                sources.append(item.get("source", ""))
+
+    if with_sources:
+        return np.array(X), np.array(y), sources
     return np.array(X), np.array(y)
 
 
+def load_sparse_dataset(path: str, with_sources: bool = False):
+    import numpy as np
+    from dataset import load_sparse_arrays
+
+    X, columns = load_sparse_arrays(path)
+    y = np.array([LABEL_MAPPING.get(str(label), 4) for label in columns["labels"]])
+
+    csr_bytes = X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    dense_bytes = X.shape[0] * X.shape[1] * 4
+    print(
+        f"CSR matrix: {X.nnz} nonzeros ({X.nnz / max(dense_bytes // 4, 1):.1%} dense), "
+        f"{csr_bytes / 1024:.1f} KB vs {dense_bytes / 1024:.1f} KB dense float32"
+    )
+    if with_sources:
+        return X, y, [str(source) for source in columns["sources"]]
+    return X, y
+
+
+def is_sparse(X) -> bool:
+    return hasattr(X, "toarray")
+
+
+def split_dataset(X, y):
+    from sklearn.model_selection import train_test_split
+
+    X_train, X_temp, y_train, y_temp = train_test_split(
+        X, y, test_size=0.3, random_state=42, stratify=y
+    )
+    X_val, X_test, y_val, y_test = train_test_split(
+        X_temp, y_temp, test_size=0.5, random_state=42, stratify=y_temp
+    )
+    return X_train, X_val, X_test, y_train, y_val, y_test
+
+
 def train_model(X_train, y_train, X_val, y_val):
+    import xgboost as xgb
+
     model = xgb.XGBClassifier(
         n_estimators=150,
         max_depth=6,
@@ -55,10 +111,28 @@ def train_model(X_train, y_train, X_val, y_val):
 
     model.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
 
+    if is_sparse(X_train):
+        model.get_booster().set_attr(**{ZERO_AS_MISSING_ATTR: "1"})
+
+    return model
+
+
+def save_model(model, path: str):
+    model.save_model(path)
+    print(f"Model saved to {path}")
+
+
+def load_model(path: str):
+    import xgboost as xgb
+
+    model = xgb.XGBClassifier()
+    model.load_model(path)
     return model
 
 
 def evaluate_model(model, X_test, y_test):
+    from sklearn.metrics import classification_report, accuracy_score
+
     predictions = model.predict(X_test)
     accuracy = accuracy_score(y_test, predictions)
 
@@ -76,10 +150,17 @@ def evaluate_model(model, X_test, y_test):
 
 
 def export_to_onnx(model, output_path: str):
-    initial_type = [("float_input", FloatTensorType([None, 45]))]
+    import onnx
+    from onnxmltools.convert import convert_xgboost
+    from onnxmltools.convert.common.data_types import FloatTensorType
+
+    initial_type = [("float_input", FloatTensorType([None, NUM_FEATURES]))]
 
     onnx_model = convert_xgboost(model, initial_types=initial_type)
 
+    if model.get_booster().attr(ZERO_AS_MISSING_ATTR):
+        onnx_model = _map_zero_to_missing(onnx_model)
+
     onnx.save(onnx_model, output_path)
 
     size_kb = len(onnx_model.SerializeToString()) / 1024
@@ -89,44 +170,228 @@ def export_to_onnx(model, output_path: str):
     return onnx_model
 
 
-def verify_onnx_model(onnx_path: str, X_sample: np.ndarray):
+def _map_zero_to_missing(onnx_model):
+    """Prepend Where(x == 0, NaN, x) so dense callers match sparse training."""
+    from onnx import TensorProto, helper
+
+    graph = onnx_model.graph
+    input_name = graph.input[0].name
+    mapped_name = f"{input_name}_zero_as_missing"
+
+    for node in graph.node:
+        for i, name in enumerate(node.input):
+            if name == input_name:
+                node.input[i] = mapped_name
+
+    preprocess = [
+        helper.make_node(
+            "Constant",
+            [],
+            ["zero_const"],
+            value=helper.make_tensor("zero", TensorProto.FLOAT, [], [0.0]),
+        ),
+        helper.make_node(
+            "Constant",
+            [],
+            ["nan_const"],
+            value=helper.make_tensor("nan", TensorProto.FLOAT, [], [float("nan")]),
+        ),
+        helper.make_node("Equal", [input_name, "zero_const"], ["is_zero"]),
+        helper.make_node("Where", ["is_zero", "nan_const", input_name], [mapped_name]),
+    ]
+    nodes = preprocess + list(graph.node)
+    del graph.node[:]
+    graph.node.extend(nodes)
+
+    if not any(opset.domain in ("", "ai.onnx") for opset in onnx_model.opset_import):
+        onnx_model.opset_import.append(helper.make_opsetid("", 13))
+
+    return onnx_model
+
+
+def export_static_batch_model(onnx_model, output_path: str, batch_size: int = 1):
+    import onnx
+
+    static_model = copy.deepcopy(onnx_model)
+
+    for value_info in list(static_model.graph.input) + list(
+        static_model.graph.output
+    ):
+        batch_dim = value_info.type.tensor_type.shape.dim[0]
+        batch_dim.Clear()
+        batch_dim.dim_value = batch_size
+
+    onnx.checker.check_model(static_model)
+    onnx.save(static_model, output_path)
+
+    size_kb = len(static_model.SerializeToString()) / 1024
+    print(f"Static batch-{batch_size} model exported to {output_path}")
+    print(f"Model size: {size_kb:.2f} KB")
+
+    return static_model
+
+
+def export_ort_format(onnx_path: str, output_path: str):
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    # Extended rather than "all": layout optimizations are hardware specific
+    # and would tie the artifact to this machine instead of the wasm backend.
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    options.optimized_model_filepath = output_path
+    options.add_session_config_entry("session.save_model_format", "ORT")
+    ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+
+    with open(output_path, "rb") as f:
+        size_kb = len(f.read()) / 1024
+    print(f"ORT-format model exported to {output_path}")
+    print(f"Model size: {size_kb:.2f} KB")
+
+
+def verify_onnx_model(onnx_path: str, X_sample):
+    import onnxruntime as ort
+
     session = ort.InferenceSession(onnx_path)
 
+    X_sample = X_sample[:5]
+    if is_sparse(X_sample):
+        X_sample = X_sample.toarray()
+
     input_name = session.get_inputs()[0].name
-    outputs = session.run(None, {input_name: X_sample[:5]})
+    outputs = session.run(None, {input_name: X_sample})
 
     print("ONNX model verification successful")
-    print(f"Input shape: {X_sample[:5].shape}")
+    print(f"Input shape: {X_sample.shape}")
     print(f"Output shape: {outputs[0].shape}")
 
     return outputs
 
 
-def main():
+def run_training(data_path: str):
     print("Loading dataset...")
-    X, y = load_dataset("data/processed/training_data.json")
-    print(f"Loaded {len(X)} samples with {X.shape[1]} features")
+    X, y = load_dataset(data_path)
+    print(f"Loaded {X.shape[0]} samples with {X.shape[1]} features")
 
-    X_train, X_temp, y_train, y_temp = train_test_split(
-        X, y, test_size=0.3, random_state=42, stratify=y
-    )
-    X_val, X_test, y_val, y_test = train_test_split(
-        X_temp, y_temp, test_size=0.5, random_state=42, stratify=y_temp
-    )
+    X_train, X_val, X_test, y_train, y_val, y_test = split_dataset(X, y)
 
-    print(f"Train: {len(X_train)}, Val: {len(X_val)}, Test: {len(X_test)}")
+    print(f"Train: {len(y_train)}, Val: {len(y_val)}, Test: {len(y_test)}")
+    record_metric("train_samples", len(y_train))
+    record_metric("val_samples", len(y_val))
+    record_metric("test_samples", len(y_test))
 
     print("\nTraining XGBoost model...")
     model = train_model(X_train, y_train, X_val, y_val)
 
     print("\nEvaluating model...")
-    evaluate_model(model, X_test, y_test)
+    accuracy = evaluate_model(model, X_test, y_test)
+    record_metric("test_accuracy", float(accuracy))
+
+    return model, X_test, y_test
+
+
+def run_export(
+    model,
+    X_test,
+    y_test,
+    output_path: str = "models/form_detector.onnx",
+    tolerance: float = 1e-5,
+    prune: bool = True,
+    leaf_tolerance: float = 1e-3,
+    drop_tolerance: float = 1e-3,
+    max_accuracy_drop: float = 0.002,
+) -> bool:
+    import tempfile
+
+    import onnx
+    from prune import (
+        compare_pruned_model,
+        print_prune_report,
+        prune_tree_ensemble,
+        truncate_to_best_iteration,
+    )
+    from verify import (
+        check_onnx_equivalence,
+        print_equivalence_report,
+        save_export_record,
+    )
+
+    stem = output_path[: -len(".onnx")] if output_path.endswith(".onnx") else output_path
+    static_path = f"{stem}_b1.onnx"
+    ort_path = f"{stem}.ort"
+
+    model, rounds, kept_rounds = truncate_to_best_iteration(model)
+    print(f"\nTruncated booster to best iteration: {kept_rounds} of {rounds} rounds")
+    record_metric("export_rounds", kept_rounds)
 
     print("\nExporting to ONNX...")
-    export_to_onnx(model, "models/form_detector.onnx")
+    onnx_model = export_to_onnx(model, output_path)
+
+    print("\nChecking ONNX/XGBoost equivalence on the test set...")
+    report = check_onnx_equivalence(model, output_path, X_test, tolerance=tolerance)
+    print_equivalence_report(report, REVERSE_MAPPING)
+    record_metric("onnx_max_abs_error", report.max_abs_error)
+    record_metric("onnx_argmax_disagreements", report.argmax_disagreements)
+    passed = report.passed
+    export_record = {"tolerance": tolerance, "pruned": False}
+
+    if prune:
+        with tempfile.TemporaryDirectory() as tmp:
+            unpruned_path = f"{tmp}/unpruned.onnx"
+            onnx.save(onnx_model, unpruned_path)
+
+            print("\nPruning tree ensemble...")
+            stats = prune_tree_ensemble(onnx_model, leaf_tolerance, drop_tolerance)
+            onnx.checker.check_model(onnx_model)
+            onnx.save(onnx_model, output_path)
+
+            comparison = compare_pruned_model(unpruned_path, output_path, X_test, y_test)
+        print_prune_report(stats, comparison)
+        record_metric("pruned_bytes_saved", comparison["bytes_saved"])
+        record_metric("pruned_accuracy", comparison["accuracy_after"])
+
+        accuracy_drop = comparison["accuracy_before"] - comparison["accuracy_after"]
+        if accuracy_drop > max_accuracy_drop:
+            print(
+                f"Pruning cost {accuracy_drop:.4f} accuracy, more than the allowed "
+                f"{max_accuracy_drop:.4f}"
+            )
+            passed = False
+
+        # The shipped artifact is the pruned one, so check it against XGBoost
+        # too, allowing the conversion tolerance plus what pruning may move.
+        pruned_tolerance = tolerance + stats.probability_bound
+        print("\nChecking pruned ONNX/XGBoost equivalence on the test set...")
+        report = check_onnx_equivalence(
+            model, output_path, X_test, tolerance=pruned_tolerance
+        )
+        print_equivalence_report(report, REVERSE_MAPPING)
+        record_metric("pruned_onnx_max_abs_error", report.max_abs_error)
+        passed = passed and report.passed
+        export_record = {
+            "tolerance": pruned_tolerance,
+            "pruned": True,
+            "leaf_tolerance": leaf_tolerance,
+            "drop_tolerance": drop_tolerance,
+            "probability_bound": stats.probability_bound,
+        }
+
+    save_export_record(output_path, export_record)
+
+    export_static_batch_model(onnx_model, static_path)
+    export_ort_format(output_path, ort_path)
 
     print("\nVerifying ONNX model...")
-    verify_onnx_model("models/form_detector.onnx", X_test)
+    verify_onnx_model(output_path, X_test)
+    verify_onnx_model(ort_path, X_test)
+    verify_onnx_model(static_path, X_test[:1])
+
+    return passed
+
+
+def main():
+    model, X_test, y_test = run_training("data/processed/training_data.json")
+    if not run_export(model, X_test, y_test, "models/form_detector.onnx"):
+        sys.exit(1)
 
     print("\nTraining complete!")
 
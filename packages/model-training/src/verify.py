@@ -0,0 +1,188 @@
+"""Full-dataset equivalence check between the XGBoost model and its ONNX export.
+
+The dataset is split into row chunks that are scored by both
+``model.predict_proba`` and an ONNX Runtime session on a thread pool (both
+release the GIL while predicting). Only per-chunk summaries and a bounded
+list of the worst rows are kept.
+
+Export writes ``<model>.onnx.export.json`` recording the tolerance its own
+check used (wider for a pruned model), so a later ``verify`` of the same
+artifact holds it to the same bound.
+"""
+
+import heapq
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from train import ZERO_AS_MISSING_ATTR, is_sparse
+
+
+@dataclass
+class EquivalenceReport:
+    rows: int = 0
+    chunks: int = 0
+    max_abs_error: float = 0.0
+    argmax_disagreements: int = 0
+    # Disagreements on rows whose top two XGBoost probabilities are within
+    # 2 * tolerance, which the tolerance itself allows to swap.
+    near_tie_disagreements: int = 0
+    rows_over_tolerance: int = 0
+    tolerance: float = 0.0
+    # (abs_error, row, xgboost_argmax, onnx_argmax), worst first
+    offending_rows: List[Tuple[float, int, int, int]] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return (
+            self.argmax_disagreements == self.near_tie_disagreements
+            and self.rows_over_tolerance == 0
+        )
+
+
+def export_record_path(onnx_path: str) -> str:
+    return f"{onnx_path}.export.json"
+
+
+def _onnx_fingerprint(onnx_path: str) -> Dict[str, int]:
+    stat = os.stat(onnx_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def save_export_record(onnx_path: str, record: Dict[str, Any]):
+    with open(export_record_path(onnx_path), "w") as f:
+        json.dump({**record, "onnx": _onnx_fingerprint(onnx_path)}, f, indent=2)
+
+
+def recorded_tolerance(onnx_path: str) -> Optional[float]:
+    """The tolerance export checked ``onnx_path`` against, if still current."""
+    path = export_record_path(onnx_path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        record = json.load(f)
+    if record.get("onnx") != _onnx_fingerprint(onnx_path):
+        return None
+    return record["tolerance"]
+
+
+def _probability_output(session) -> str:
+    names = [output.name for output in session.get_outputs()]
+    return "probabilities" if "probabilities" in names else names[-1]
+
+
+def _compare_chunk(
+    model,
+    session,
+    X_chunk,
+    start: int,
+    sparse_model: bool,
+    tolerance: float,
+    max_offenders: int,
+):
+    import numpy as np
+    from scipy import sparse
+
+    dense = X_chunk.toarray() if is_sparse(X_chunk) else np.asarray(X_chunk)
+    dense = dense.astype(np.float32, copy=False)
+    # A booster trained on CSR must see CSR so zeros stay "missing", which is
+    # what the exported graph reproduces for dense input.
+    xgb_input = sparse.csr_matrix(dense) if sparse_model else dense
+
+    expected = model.predict_proba(xgb_input)
+    input_name = session.get_inputs()[0].name
+    actual = session.run([_probability_output(session)], {input_name: dense})[0]
+
+    row_errors = np.abs(expected - actual).max(axis=1)
+    expected_labels = expected.argmax(axis=1)
+    actual_labels = actual.argmax(axis=1)
+    mismatched = expected_labels != actual_labels
+    top_two = np.sort(expected, axis=1)[:, -2:]
+    near_tie = top_two[:, 1] - top_two[:, 0] <= 2 * tolerance
+    offending = np.flatnonzero(mismatched | (row_errors > tolerance))
+
+    worst = offending[np.argsort(-row_errors[offending])][:max_offenders]
+    offenders = [
+        (
+            float(row_errors[i]),
+            start + int(i),
+            int(expected_labels[i]),
+            int(actual_labels[i]),
+        )
+        for i in worst
+    ]
+
+    return {
+        "rows": len(dense),
+        "max_abs_error": float(row_errors.max()) if len(dense) else 0.0,
+        "argmax_disagreements": int(mismatched.sum()),
+        "near_tie_disagreements": int((mismatched & near_tie).sum()),
+        "rows_over_tolerance": int((row_errors > tolerance).sum()),
+        "offenders": offenders,
+    }
+
+
+def check_onnx_equivalence(
+    model,
+    onnx_path: str,
+    X,
+    tolerance: float = 1e-5,
+    chunk_size: int = 4096,
+    workers: int = 4,
+    max_offenders: int = 20,
+) -> EquivalenceReport:
+    import onnxruntime as ort
+
+    session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+    sparse_model = bool(model.get_booster().attr(ZERO_AS_MISSING_ATTR))
+    report = EquivalenceReport(tolerance=tolerance)
+    worst: List[Tuple[float, int, int, int]] = []
+
+    def run_chunk(start: int):
+        return _compare_chunk(
+            model,
+            session,
+            X[start : start + chunk_size],
+            start,
+            sparse_model,
+            tolerance,
+            max_offenders,
+        )
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Tasks carry only row offsets; each worker slices its own chunk, so
+        # at most `workers` dense chunks exist at a time.
+        for result in pool.map(run_chunk, range(0, X.shape[0], chunk_size)):
+            report.rows += result["rows"]
+            report.chunks += 1
+            report.max_abs_error = max(report.max_abs_error, result["max_abs_error"])
+            report.argmax_disagreements += result["argmax_disagreements"]
+            report.near_tie_disagreements += result["near_tie_disagreements"]
+            report.rows_over_tolerance += result["rows_over_tolerance"]
+            for offender in result["offenders"]:
+                if len(worst) < max_offenders:
+                    heapq.heappush(worst, offender)
+                else:
+                    heapq.heappushpop(worst, offender)
+
+    report.offending_rows = sorted(worst, reverse=True)
+    return report
+
+
+def print_equivalence_report(report: EquivalenceReport, label_names=None):
+    print(f"Compared {report.rows} rows in {report.chunks} chunks")
+    print(f"Max absolute probability error: {report.max_abs_error:.3e}")
+    print(
+        f"Argmax disagreements: {report.argmax_disagreements} "
+        f"({report.near_tie_disagreements} on near-ties within 2x tolerance)"
+    )
+    print(f"Rows over tolerance ({report.tolerance:g}): {report.rows_over_tolerance}")
+
+    for error, row, expected, actual in report.offending_rows:
+        if label_names:
+            expected, actual = label_names[expected], label_names[actual]
+        print(f"  row {row}: error {error:.3e}, xgboost={expected}, onnx={actual}")
+
+    print("Equivalence check " + ("passed" if report.passed else "FAILED"))
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# The toolkit is a flat set of scripts under src/ that import each other by
+# module name, the same way `python src/cli.py` resolves them.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
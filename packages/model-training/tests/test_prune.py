@@ -0,0 +1,97 @@
+import copy
+
+import numpy as np
+import pytest
+
+from prune import prune_tree_ensemble
+
+NUM_FEATURES = 6
+
+# Folding a single-leaf tree into base_values is exact, but ONNX Runtime then
+# adds the same float32 terms in a different order.
+FLOAT32_SLACK = 1e-6
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.random((600, NUM_FEATURES)).astype(np.float32)
+    X[rng.random(X.shape) < 0.1] = np.nan
+    y = (np.nan_to_num(X[:, 0]) * 3 + np.nan_to_num(X[:, 1]) * 2).astype(int)
+    noise = rng.random(len(y)) < 0.15
+    y[noise] = rng.integers(0, 5, noise.sum())
+    return X, np.clip(y, 0, 4)
+
+
+@pytest.fixture(scope="module")
+def onnx_model(data):
+    import xgboost as xgb
+    from onnxmltools.convert import convert_xgboost
+    from onnxmltools.convert.common.data_types import FloatTensorType
+
+    X, y = data
+    model = xgb.XGBClassifier(
+        n_estimators=40,
+        max_depth=4,
+        learning_rate=0.3,
+        gamma=0.1,
+        objective="multi:softprob",
+        num_class=5,
+        random_state=0,
+    )
+    model.fit(X, y)
+    return convert_xgboost(
+        model, initial_types=[("float_input", FloatTensorType([None, NUM_FEATURES]))]
+    )
+
+
+def _probabilities(onnx_model, X):
+    import onnx
+    import onnxruntime as ort
+
+    onnx.checker.check_model(onnx_model)
+    session = ort.InferenceSession(
+        onnx_model.SerializeToString(), providers=["CPUExecutionProvider"]
+    )
+    return session.run(None, {session.get_inputs()[0].name: X})[1]
+
+
+def test_zero_tolerance_prune_preserves_probabilities(onnx_model, data):
+    X, _ = data
+    pruned = copy.deepcopy(onnx_model)
+
+    stats = prune_tree_ensemble(pruned, leaf_tolerance=0.0, drop_tolerance=0.0)
+
+    assert stats.folded_trees > 0
+    assert stats.collapsed_splits == 0
+    assert stats.dropped_trees == 0
+    assert stats.probability_bound == 0
+    assert stats.trees_after + stats.folded_trees == stats.trees_before
+    np.testing.assert_allclose(
+        _probabilities(pruned, X),
+        _probabilities(onnx_model, X),
+        rtol=0,
+        atol=FLOAT32_SLACK,
+    )
+
+
+def test_positive_tolerance_bounds_probability_change(onnx_model, data):
+    X, _ = data
+    leaf_tolerance, drop_tolerance = 0.05, 0.01
+    pruned = copy.deepcopy(onnx_model)
+
+    stats = prune_tree_ensemble(pruned, leaf_tolerance, drop_tolerance)
+
+    assert stats.collapsed_splits > 0
+    assert stats.nodes_after < stats.nodes_before
+    # A row reaches one leaf per tree, and each collapse on its path moves
+    # that leaf by at most half the tolerance, so a class margin moves by at
+    # most collapsed_splits * leaf_tolerance / 2 plus drop_tolerance per
+    # dropped tree. The tracked bound is tighter but must stay within that.
+    margin_bound = (
+        stats.collapsed_splits * leaf_tolerance / 2
+        + stats.dropped_trees * drop_tolerance
+    )
+    assert 0 < stats.probability_bound <= margin_bound / 2
+    change = np.abs(_probabilities(pruned, X) - _probabilities(onnx_model, X)).max()
+    assert change <= stats.probability_bound + FLOAT32_SLACK